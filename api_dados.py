@@ -0,0 +1,407 @@
+"""API HTTP (biblioteca padrão) com os recortes dos dados processados.
+
+Serve as mesmas tabelas da página direto dos loaders em cache do
+modelo_dados, sem renderizar o Streamlit:
+
+    python api_dados.py --porta 8502
+    python api_dados.py --medir          # custo por requisição, sem rede
+
+Rotas (GET):
+
+* /percentuais?ano=2023&paises=Brasil,China  participações (%) do ano ou "Inicial"
+* /tkm?ano=2023&paises=...                   tkm absoluto (bilhões)
+* /variacao?ano_a=2014&ano_b=2023&paises=... variação (p.p.) e CAGR do tkm
+* /metadados                                 anos, países, modais e versões
+
+paises é opcional (vírgula; omitido = todos). Formato por ?formato= ou pelo
+cabeçalho Accept: json (padrão), csv e, com pyarrow, arrow e parquet.
+
+O ETag (forte) é o hash da versão do conteúdo das fontes, da rota, dos
+parâmetros canônicos e da representação; If-None-Match com o mesmo ETag
+responde 304 depois de a consulta ser validada (do cache, se já atendida).
+Erros saem em JSON com o status HTTP (500 para falhas inesperadas).
+As respostas codificadas (e comprimidas com gzip, se aceito) ficam em um
+cache LRU por ETag: repetir um recorte custa uma consulta a dicionário.
+"""
+import io
+import os
+import gzip
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+import importlib.util
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from modelo_dados import (
+    assinatura_fonte,
+    carregar_cubo_percentuais,
+    carregar_modelo_tkm,
+    carregar_variacoes,
+    fatia_cubo,
+    ordenar_paises,
+    posicao_ano,
+    posicao_par,
+    rotulos_cenarios,
+    versao_fonte,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Intervalo (s) entre verificações dos arquivos das fontes (stat)
+INTERVALO_VERIFICACAO = float(os.environ.get('APP1_API_INTERVALO', '1.0'))
+CAPACIDADE_RESPOSTAS = int(os.environ.get('APP1_API_CACHE', '512'))
+# Corpos menores do que isso não compensam o gzip
+MINIMO_GZIP = 256
+
+TIPOS_FORMATO = {
+    'json': 'application/json; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# ==============================================================================
+# 1. VERSÃO DAS FONTES
+# ==============================================================================
+# Última verificação por fonte: nome -> (instante, assinatura, versão do conteúdo)
+_versoes = {}
+_trava_versoes = threading.Lock()
+
+def versao_atual(nome):
+    """(assinatura, versão do conteúdo) da fonte.
+
+    Os arquivos são verificados no máximo a cada INTERVALO_VERIFICACAO; o
+    hash do conteúdo (versao_fonte) só é refeito quando a assinatura muda.
+    """
+    agora = time.monotonic()
+    with _trava_versoes:
+        atual = _versoes.get(nome)
+    if atual is not None and agora - atual[0] < INTERVALO_VERIFICACAO:
+        return atual[1], atual[2]
+    assinatura = assinatura_fonte(nome)
+    versao = atual[2] if atual is not None and atual[1] == assinatura else versao_fonte(nome, assinatura)
+    with _trava_versoes:
+        _versoes[nome] = (agora, assinatura, versao)
+    return assinatura, versao
+
+# ==============================================================================
+# 2. RECORTES (MESMAS TABELAS DA PÁGINA)
+# ==============================================================================
+class ErroConsulta(Exception):
+    """Consulta inválida; carrega o status HTTP da resposta."""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+def parametro(consulta, nome):
+    valor = consulta.get(nome)
+    if not valor:
+        raise ErroConsulta(400, f"Parâmetro obrigatório ausente: {nome}")
+    return valor
+
+def paises_consulta(consulta, cubo):
+    """Países pedidos na ordem do cubo (todos se omitido); desconhecidos -> 404."""
+    if not consulta.get('paises'):
+        return list(cubo.paises)
+    paises = consulta['paises'].split(',')
+    desconhecidos = [p for p in paises if p not in cubo.idx_pais]
+    if desconhecidos:
+        raise ErroConsulta(404, f"Países desconhecidos: {', '.join(desconhecidos)}")
+    return ordenar_paises(paises, cubo)
+
+def ano_inteiro(consulta, nome):
+    try:
+        return int(parametro(consulta, nome))
+    except ValueError:
+        raise ErroConsulta(400, f"Ano inválido em {nome}: {consulta[nome]!r}") from None
+
+def recorte_percentuais(consulta, assinaturas):
+    """Participações (%) País x Modal de um ano (ou do cenário inicial)."""
+    cubo = carregar_cubo_percentuais(assinaturas['percentuais'])
+    ano = parametro(consulta, 'ano')
+    if ano not in rotulos_cenarios(cubo):
+        raise ErroConsulta(404, f"Ano sem dados percentuais: {ano}")
+    df = fatia_cubo(cubo, paises_consulta(consulta, cubo), ano)
+    # float32 -> float com as 2 casas da fonte
+    return df.astype(float).round(2).reset_index()
+
+def recorte_tkm(consulta, assinaturas):
+    """tkm absoluto (bilhões) País x Modal de um ano."""
+    cubo_tkm = carregar_modelo_tkm(assinaturas['tkm'])
+    ano = parametro(consulta, 'ano')
+    if posicao_ano(cubo_tkm, ano) is None:
+        raise ErroConsulta(404, f"Ano sem dados de tkm: {ano}")
+    return fatia_cubo(cubo_tkm, paises_consulta(consulta, cubo_tkm), ano).reset_index()
+
+def recorte_variacao(consulta, assinaturas):
+    """Variação (p.p.) e CAGR do tkm (% a.a.) por País x Modal entre dois anos."""
+    ano_a, ano_b = ano_inteiro(consulta, 'ano_a'), ano_inteiro(consulta, 'ano_b')
+    cubo = carregar_cubo_percentuais(assinaturas['percentuais'])
+    variacoes = carregar_variacoes(assinaturas['percentuais'], assinaturas['tkm'])
+    if ano_a not in variacoes.idx_ano or ano_b not in variacoes.idx_ano:
+        raise ErroConsulta(404, f"Anos fora da série: {ano_a}, {ano_b}")
+    if ano_b < ano_a:
+        raise ErroConsulta(400, "O ano final (ano_b) não pode ser anterior ao inicial (ano_a).")
+    linhas = [cubo.idx_pais[p] for p in paises_consulta(consulta, cubo)]
+    par = posicao_par(variacoes, ano_a, ano_b)
+    df = pd.DataFrame({
+        'Pais': np.repeat([cubo.paises[p] for p in linhas], len(cubo.modais)),
+        'Modal': np.tile(cubo.modais, len(linhas)),
+        'Variação (p.p.)': np.round(variacoes.delta_pp[linhas, par, :].astype(float).ravel(), 2),
+        'CAGR tkm (%)': np.round(variacoes.cagr_tkm[linhas, par, :].ravel() * 100, 4),
+    })
+    return df.dropna(subset=['Variação (p.p.)']).reset_index(drop=True)
+
+def metadados(consulta, assinaturas):
+    """Eixos disponíveis e versões das fontes."""
+    cubo = carregar_cubo_percentuais(assinaturas['percentuais'])
+    cubo_tkm = carregar_modelo_tkm(assinaturas['tkm'])
+    return {
+        'anos_percentuais': rotulos_cenarios(cubo),
+        'anos_tkm': [str(a) for a in cubo_tkm.anos],
+        'paises': list(cubo.paises),
+        'modais': list(cubo.modais),
+        'versoes': {nome: versao_atual(nome)[1] for nome in ('percentuais', 'tkm')},
+    }
+
+# Rota -> (função do recorte, parâmetros que entram no ETag)
+ROTAS = {
+    '/percentuais': (recorte_percentuais, ('ano', 'paises')),
+    '/tkm': (recorte_tkm, ('ano', 'paises')),
+    '/variacao': (recorte_variacao, ('ano_a', 'ano_b', 'paises')),
+    '/metadados': (metadados, ()),
+}
+
+# ==============================================================================
+# 3. FORMATOS DE SAÍDA
+# ==============================================================================
+def formatos_disponiveis():
+    """json e csv sempre; arrow e parquet só com pyarrow instalado."""
+    formatos = ['json', 'csv']
+    if importlib.util.find_spec('pyarrow'):
+        formatos += ['arrow', 'parquet']
+    return formatos
+
+def escolher_formato(consulta, accept):
+    """Formato pedido por ?formato= ou, na falta dele, pelo cabeçalho Accept."""
+    formato = consulta.get('formato')
+    if formato is None:
+        formato = next((f for f, tipo in TIPOS_FORMATO.items() if tipo.split(';')[0] in (accept or '')), 'json')
+    if formato not in TIPOS_FORMATO:
+        raise ErroConsulta(400, f"Formato desconhecido: {formato!r} (use {', '.join(TIPOS_FORMATO)})")
+    if formato not in formatos_disponiveis():
+        raise ErroConsulta(406, f"Formato {formato} requer pyarrow.")
+    return formato
+
+def codificar(dados, formato):
+    """DataFrame (ou dicionário, só em JSON) -> bytes no formato pedido."""
+    if isinstance(dados, dict):
+        if formato != 'json':
+            raise ErroConsulta(406, "Esta rota só responde em JSON.")
+        return json.dumps(dados, ensure_ascii=False).encode('utf-8')
+    if formato == 'json':
+        linhas = dados.astype(object).where(dados.notna(), None).to_dict(orient='records')
+        return json.dumps({'colunas': list(dados.columns), 'linhas': linhas}, ensure_ascii=False).encode('utf-8')
+    if formato == 'csv':
+        return dados.to_csv(index=False).encode('utf-8')
+    if formato == 'parquet':
+        saida = io.BytesIO()
+        dados.to_parquet(saida, index=False)
+        return saida.getvalue()
+    import pyarrow as pa
+    tabela = pa.Table.from_pandas(dados, preserve_index=False)
+    saida = pa.BufferOutputStream()
+    with pa.ipc.new_stream(saida, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return saida.getvalue().to_pybytes()
+
+# ==============================================================================
+# 4. RESPOSTAS (ETAG, 304, GZIP E CACHE)
+# ==============================================================================
+class Resposta(NamedTuple):
+    status: int
+    cabecalhos: dict
+    corpo: bytes = b''
+
+class CacheRespostas:
+    """Cache LRU de respostas codificadas por ETag, compartilhado pelo processo."""
+
+    def __init__(self, capacidade):
+        self.capacidade = capacidade
+        self.acertos = 0
+        self.falhas = 0
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, etag):
+        with self._trava:
+            resposta = self._itens.get(etag)
+            if resposta is None:
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(etag)
+            self.acertos += 1
+            return resposta
+
+    def guardar(self, etag, resposta):
+        with self._trava:
+            self._itens[etag] = resposta
+            self._itens.move_to_end(etag)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+
+cache_respostas = CacheRespostas(CAPACIDADE_RESPOSTAS)
+
+def resposta_erro(status, mensagem):
+    corpo = json.dumps({'erro': mensagem}, ensure_ascii=False).encode('utf-8')
+    return Resposta(status, {'Content-Type': TIPOS_FORMATO['json'], 'Cache-Control': 'no-store'}, corpo)
+
+def aceita_gzip(accept_encoding):
+    """Accept-Encoding admite gzip? Respeita os q-values (q=0 recusa), também via '*'."""
+    pesos = {}
+    for item in (accept_encoding or '').split(','):
+        codificacao, _, parametros = item.partition(';')
+        peso = 1.0
+        for parametro in parametros.split(';'):
+            nome, _, valor = parametro.partition('=')
+            if nome.strip().lower() == 'q':
+                try:
+                    peso = float(valor)
+                except ValueError:
+                    peso = 0.0
+        pesos[codificacao.strip().lower()] = peso
+    return pesos.get('gzip', pesos.get('x-gzip', pesos.get('*', 0.0))) > 0
+
+def etag_atendido(if_none_match, etag):
+    """If-None-Match contém o ETag (ou '*')?"""
+    if not if_none_match:
+        return False
+    return any(valor.strip() in ('*', etag) for valor in if_none_match.split(','))
+
+def responder(caminho, cabecalhos):
+    """Resposta a um GET (caminho com query string); independente do servidor HTTP."""
+    partes = urlsplit(caminho)
+    if partes.path not in ROTAS:
+        return resposta_erro(404, f"Rota desconhecida: {partes.path} (use {', '.join(ROTAS)})")
+    funcao, nomes_parametros = ROTAS[partes.path]
+    consulta = {nome: valores[-1].strip() for nome, valores in parse_qs(partes.query).items()}
+    if consulta.get('paises'):
+        # Forma canônica: mesma seleção em qualquer ordem -> mesmo ETag
+        consulta['paises'] = ','.join(sorted({p.strip() for p in consulta['paises'].split(',') if p.strip()}))
+    try:
+        formato = escolher_formato(consulta, cabecalhos.get('Accept'))
+        assinatura_pct, versao_pct = versao_atual('percentuais')
+        assinatura_tkm, versao_tkm = versao_atual('tkm')
+        comprimir = formato != 'parquet' and aceita_gzip(cabecalhos.get('Accept-Encoding'))
+        chave = (versao_pct, versao_tkm, partes.path, tuple(consulta.get(n) for n in nomes_parametros), formato, comprimir)
+        etag = '"' + hashlib.sha1(repr(chave).encode('utf-8')).hexdigest() + '"'
+
+        # Só respostas válidas entram no cache; na falta, a consulta é
+        # executada (e validada) antes de olhar os cabeçalhos condicionais
+        resposta = cache_respostas.obter(etag)
+        if resposta is None:
+            corpo = codificar(funcao(consulta, {'percentuais': assinatura_pct, 'tkm': assinatura_tkm}), formato)
+            cabecalhos_resposta = {
+                'Content-Type': TIPOS_FORMATO[formato],
+                'ETag': etag,
+                'Cache-Control': 'no-cache',
+                'Vary': 'Accept, Accept-Encoding',
+            }
+            if comprimir and len(corpo) >= MINIMO_GZIP:
+                # mtime fixo: mesmo conteúdo -> mesmos bytes (ETag forte)
+                corpo = gzip.compress(corpo, mtime=0)
+                cabecalhos_resposta['Content-Encoding'] = 'gzip'
+            resposta = Resposta(200, cabecalhos_resposta, corpo)
+            cache_respostas.guardar(etag, resposta)
+        if etag_atendido(cabecalhos.get('If-None-Match'), etag):
+            return Resposta(304, {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept, Accept-Encoding'})
+        return resposta
+    except ErroConsulta as erro:
+        return resposta_erro(erro.status, str(erro))
+
+class ManipuladorApi(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'App1Dados/1.0'
+
+    def do_GET(self):
+        try:
+            resposta = responder(self.path, self.headers)
+        except Exception:
+            # Falha inesperada (carga dos cubos, codificação...): ainda um erro JSON com status
+            _LOGGER.exception("Erro ao responder %s", self.path)
+            resposta = resposta_erro(500, "Erro interno ao montar a resposta.")
+        self.send_response(resposta.status)
+        for nome, valor in resposta.cabecalhos.items():
+            self.send_header(nome, valor)
+        self.send_header('Content-Length', str(len(resposta.corpo)))
+        self.end_headers()
+        self.wfile.write(resposta.corpo)
+
+    def log_message(self, formato, *args):
+        if not self.server.silencioso:
+            super().log_message(formato, *args)
+
+def criar_servidor(host='127.0.0.1', porta=8502, silencioso=False):
+    """Servidor HTTP com uma thread por conexão."""
+    servidor = ThreadingHTTPServer((host, porta), ManipuladorApi)
+    servidor.daemon_threads = True
+    servidor.silencioso = silencioso
+    return servidor
+
+# ==============================================================================
+# 5. LINHA DE COMANDO
+# ==============================================================================
+def medir_respostas(repeticoes=2000):
+    """Mediana (µs) de responder() por rota: cache de respostas e revalidação (304)."""
+    consultas = [
+        '/percentuais?ano=2023&paises=Brasil,China,EUA',
+        '/tkm?ano=2023',
+        '/variacao?ano_a=2014&ano_b=2023',
+    ]
+    resultados = {}
+    for caminho in consultas:
+        primeira = responder(caminho, {'Accept-Encoding': 'gzip'})
+        for rotulo, cabecalhos in [
+            ('cache', {'Accept-Encoding': 'gzip'}),
+            ('304', {'Accept-Encoding': 'gzip', 'If-None-Match': primeira.cabecalhos['ETag']}),
+        ]:
+            tempos = []
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                responder(caminho, cabecalhos)
+                tempos.append(time.perf_counter() - inicio)
+            resultados[(caminho, rotulo)] = float(np.median(tempos)) * 1e6
+    return resultados
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="API HTTP com os recortes dos dados do App1.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8502)
+    parser.add_argument('--silencioso', action='store_true', help="Não registra cada requisição.")
+    parser.add_argument('--medir', action='store_true', help="Só mede o custo de responder() por rota.")
+    args = parser.parse_args()
+    # Os loaders em cache rodam fora de uma sessão do Streamlit (aviso esperado)
+    logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').setLevel(logging.ERROR)
+
+    if args.medir:
+        for (caminho, rotulo), micros in medir_respostas().items():
+            print(f"{caminho:<50}{rotulo:>6}: {micros:.1f} µs")
+    else:
+        servidor = criar_servidor(args.host, args.porta, args.silencioso)
+        print(f"API de dados em http://{args.host}:{args.porta} (rotas: {', '.join(ROTAS)})")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
@@ -0,0 +1,85 @@
+"""Aquecimento dos caches em segundo plano após a partida do processo.
+
+Sem aquecimento, o primeiro usuário após um deploy paga todas as falhas de
+cache (cubos das tabelas e a figura de cada posição da linha do tempo). A
+página monta a lista de etapas (rótulo, função) e executar_em_segundo_plano
+as roda em uma thread daemon: nenhum rerun espera por ela, e quem pedir um
+item ainda não aquecido apenas o constrói como antes. O andamento fica em
+ProgressoAquecimento (exibido na barra lateral).
+
+Desligável com APP1_AQUECIMENTO=0.
+"""
+import os
+import time
+import logging
+import threading
+
+ATIVO = os.environ.get('APP1_AQUECIMENTO', '1') == '1'
+NOME_THREAD = 'app1-aquecimento'
+
+_LOGGER = logging.getLogger(__name__)
+
+# Loaders st.cache_* chamados fora de um rerun avisam, a cada chamada, que não
+# há ScriptRunContext; na thread de aquecimento isso é esperado.
+def _sem_aviso_de_contexto(registro):
+    return registro.threadName != NOME_THREAD
+
+logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').addFilter(_sem_aviso_de_contexto)
+
+class ProgressoAquecimento:
+    """Andamento das etapas, lido pelos reruns enquanto a thread avança."""
+
+    def __init__(self, etapas):
+        self.total = len(etapas)
+        self.concluidas = 0
+        self.atual = None
+        self.falhas = []
+        self.duracao = None
+        self._inicio = time.perf_counter()
+        self._trava = threading.Lock()
+
+    def iniciar_etapa(self, rotulo):
+        with self._trava:
+            self.atual = rotulo
+
+    def concluir_etapa(self, erro=None):
+        with self._trava:
+            if erro is not None:
+                self.falhas.append((self.atual, repr(erro)))
+            self.concluidas += 1
+            self.atual = None
+            if self.concluidas == self.total:
+                self.duracao = time.perf_counter() - self._inicio
+
+    def estado(self):
+        """Cópia consistente do andamento."""
+        with self._trava:
+            return {
+                'concluidas': self.concluidas,
+                'total': self.total,
+                'atual': self.atual,
+                'falhas': list(self.falhas),
+                'finalizado': self.duracao is not None,
+                'duracao_s': self.duracao if self.duracao is not None else time.perf_counter() - self._inicio,
+            }
+
+def executar_em_segundo_plano(etapas):
+    """Roda as etapas (rótulo, função) em ordem numa thread daemon; devolve o progresso.
+
+    Uma etapa com erro é registrada e as seguintes continuam.
+    """
+    progresso = ProgressoAquecimento(etapas)
+
+    def executar():
+        for rotulo, funcao in etapas:
+            progresso.iniciar_etapa(rotulo)
+            try:
+                funcao()
+            except Exception as erro:
+                _LOGGER.warning("Aquecimento: etapa '%s' falhou: %r", rotulo, erro)
+                progresso.concluir_etapa(erro)
+            else:
+                progresso.concluir_etapa()
+
+    threading.Thread(target=executar, name=NOME_THREAD, daemon=True).start()
+    return progresso
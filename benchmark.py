@@ -0,0 +1,262 @@
+"""Benchmark headless da página (Streamlit AppTest) com dados sintéticos.
+
+Mede, por tipo de interação, o tempo de rerun (p50/p95) e o pico de memória
+alocada, sem navegador e sem rede:
+
+    python benchmark.py                          # dados embutidos + 1000x50
+    python benchmark.py --escalas 1000x50 10000x55 --repeticoes 20
+    python benchmark.py --saida resultados.json
+    python benchmark.py --partida 5              # imports e 1º conteúdo visível
+
+Cada escala "PAÍSESxANOS" gera percentuais.csv e tkm.csv no layout das fontes
+do modelo_dados (os 36 países reais + países sintéticos, anos terminando em
+2023) e aponta o diretório de dados para eles.
+
+--partida mede, em processos novos, o primeiro rerun da página com a
+instrumentação ligada: tempo dos imports adiados, tempo até o primeiro
+conteúdo visível (título + metodologia) e total.
+
+O aquecimento em segundo plano (aquecimento.py) fica desligado: a thread
+disputaria o GIL com os reruns medidos e recomeçaria a cada limpeza de
+caches. --com-aquecimento mede também cada escala com ele ligado, como
+cenário separado ("ESCALA+aquecimento").
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import aquecimento
+import modelo_dados
+
+CAMINHO_APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'App1_Final.py')
+
+# ==============================================================================
+# 1. GERADOR DE DADOS SINTÉTICOS
+# ==============================================================================
+def gerar_dados_sinteticos(n_paises, n_anos, destino, semente=42):
+    """Grava percentuais.csv e tkm.csv com n_paises x n_anos (último ano: 2023).
+
+    Os percentuais são derivados do tkm sintético, então as duas fontes são
+    coerentes entre si.
+    """
+    rng = np.random.default_rng(semente)
+    cubo_real = modelo_dados.carregar_dados_completos(None)
+    paises = list(cubo_real.paises)
+    paises += [f"País Sintético {i:05d}" for i in range(max(0, n_paises - len(paises)))]
+    paises = paises[:max(n_paises, len(cubo_real.paises))]
+    anos = [str(a) for a in range(2024 - n_anos, 2024)]
+
+    # tkm (bilhões): escala por país x tendência por modal x ruído anual
+    escala = rng.lognormal(3, 1.2, size=(len(paises), 1, 1))
+    participacao = rng.dirichlet([2.0, 5.0, 1.0], size=len(paises))[:, None, :]
+    tendencia = 1 + rng.normal(0, 0.01, size=(len(paises), 1, 3)) * np.arange(n_anos)[None, :, None]
+    ruido = rng.normal(1, 0.03, size=(len(paises), n_anos, 3))
+    tkm = np.round(np.clip(escala * participacao * tendencia * ruido, 0.01, None), 1)
+    razoes = np.round(tkm / tkm.sum(axis=2, keepdims=True), 6)
+
+    os.makedirs(destino, exist_ok=True)
+    for nome, valores, coluna_modal, rotulos in [
+        ('percentuais', razoes, 'Combined measure', list(modelo_dados.MEDIDAS_PERCENTUAIS.values())),
+        ('tkm', tkm, 'Modal', list(modelo_dados.MEDIDAS_PERCENTUAIS)),
+    ]:
+        df_fonte = pd.DataFrame(
+            valores.transpose(0, 2, 1).reshape(-1, n_anos),
+            columns=anos
+        )
+        df_fonte.insert(0, 'Pais', np.repeat(paises, 3))
+        df_fonte.insert(1, coluna_modal, np.tile(rotulos, len(paises)))
+        df_fonte.to_csv(os.path.join(destino, f"{nome}.csv"), index=False)
+    return paises, anos
+
+# ==============================================================================
+# 2. INTERAÇÕES ROTEIRIZADAS
+# ==============================================================================
+def limpar_caches():
+    """Zera os caches do Streamlit (simula processo recém-iniciado)."""
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    modelo_dados.limpar_recentes()
+
+def aguardar_aquecimento():
+    """Espera a thread de aquecimento (se houver) terminar antes do próximo cenário."""
+    for thread in threading.enumerate():
+        if thread.name == aquecimento.NOME_THREAD:
+            thread.join()
+
+def medir(amostras, nome, acao, memoria):
+    """Executa a ação (um rerun) registrando tempo e pico de memória."""
+    if memoria:
+        tracemalloc.reset_peak()
+    inicio = time.perf_counter()
+    at = acao()
+    duracao = time.perf_counter() - inicio
+    pico = tracemalloc.get_traced_memory()[1] if memoria else float('nan')
+    if at.exception:
+        raise RuntimeError(f"{nome}: {at.exception[0].message}")
+    amostras.setdefault(nome, []).append((duracao, pico))
+    return at
+
+def executar_roteiro(repeticoes, timeout, memoria, semente=0):
+    """Carga fria, slider, multiselect e variação; devolve amostras por interação."""
+    rng = random.Random(semente)
+    amostras = {}
+
+    limpar_caches()
+    at = AppTest.from_file(CAMINHO_APP, default_timeout=timeout)
+    at = medir(amostras, 'carga_fria', at.run, memoria)
+    at = medir(amostras, 'carga_quente', AppTest.from_file(CAMINHO_APP, default_timeout=timeout).run, memoria)
+
+    # A partir daqui, uma sessão com caches aquecidos
+    opcoes_ano = [o for o in at.select_slider[0].options if o != 'Inicial']
+    at.select_slider[0].set_value(opcoes_ano[-1]).run()
+    opcoes_paises = at.sidebar.multiselect[0].options
+    selecao = []
+    for _ in range(repeticoes):
+        ano = rng.choice(opcoes_ano)
+        at = medir(amostras, 'slider', at.select_slider[0].set_value(ano).run, memoria)
+
+        selecao = (selecao + [rng.choice(opcoes_paises)])[-5:]
+        at = medir(amostras, 'multiselect', at.sidebar.multiselect[0].set_value(list(dict.fromkeys(selecao))).run, memoria)
+
+        ano_base = rng.choice(opcoes_ano[:-1])
+        at = medir(amostras, 'variacao', at.selectbox(key='ano_a').set_value(ano_base).run, memoria)
+    return amostras
+
+def resumir(amostras):
+    """p50/p95 (ms) e pico de memória (MB) por interação."""
+    resumo = {}
+    for nome, valores in amostras.items():
+        tempos = np.array([v[0] for v in valores]) * 1000
+        picos = np.array([v[1] for v in valores]) / 2**20
+        resumo[nome] = {
+            'n': len(valores),
+            'p50_ms': float(np.percentile(tempos, 50)),
+            'p95_ms': float(np.percentile(tempos, 95)),
+            'pico_mb': float(np.nanmax(picos)) if not np.isnan(picos).all() else None,
+        }
+    return resumo
+
+# ==============================================================================
+# 3. PARTIDA EM PROCESSO NOVO (IMPORTS E PRIMEIRO CONTEÚDO VISÍVEL)
+# ==============================================================================
+CODIGO_PARTIDA = """
+import sys
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2])).run()
+if at.exception:
+    raise SystemExit(at.exception[0].message)
+"""
+
+def medir_partida(repeticoes, timeout, com_aquecimento=False):
+    """Medianas (ms) do primeiro rerun em processos novos, via registros da instrumentação."""
+    amostras = []
+    with tempfile.TemporaryDirectory(prefix='app1_partida_') as temporario:
+        for i in range(repeticoes):
+            arquivo = os.path.join(temporario, f"registro_{i}.jsonl")
+            saida = subprocess.run(
+                [sys.executable, '-c', CODIGO_PARTIDA, CAMINHO_APP, str(timeout)],
+                cwd=os.path.dirname(CAMINHO_APP),
+                env={
+                    **os.environ,
+                    'APP1_INSTRUMENTACAO': '1',
+                    'APP1_INSTRUMENTACAO_ARQUIVO': arquivo,
+                    'APP1_AQUECIMENTO': '1' if com_aquecimento else '0',
+                },
+                capture_output=True, text=True
+            )
+            if saida.returncode != 0:
+                raise RuntimeError(f"partida: {saida.stderr.strip().splitlines()[-1:]}")
+            with open(arquivo, encoding='utf-8') as entrada:
+                registro = next(r for r in map(json.loads, entrada) if r['tipo'] == 'completo')
+            amostras.append([
+                registro['secoes_ms'].get('2. Importações', float('nan')),
+                registro['primeira_pintura_ms'],
+                registro['total_ms'],
+            ])
+    importacao, primeira_pintura, total = np.median(np.array(amostras, dtype=float), axis=0)
+    return {'importacao_ms': importacao, 'primeira_pintura_ms': primeira_pintura, 'total_ms': total}
+
+# ==============================================================================
+# 4. LINHA DE COMANDO
+# ==============================================================================
+def interpretar_escala(texto):
+    """'base' (dados embutidos) ou 'PAÍSESxANOS'."""
+    if texto == 'base':
+        return None
+    n_paises, n_anos = texto.lower().split('x')
+    return int(n_paises), int(n_anos)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark headless de reruns do App1.")
+    parser.add_argument('--escalas', nargs='+', default=['base', '1000x50'], help="'base' ou PAÍSESxANOS (ex.: 10000x55).")
+    parser.add_argument('--repeticoes', type=int, default=10, help="Repetições de cada interação por escala.")
+    parser.add_argument('--timeout', type=float, default=300, help="Timeout (s) de cada rerun do AppTest.")
+    parser.add_argument('--sem-memoria', action='store_true', help="Desliga o tracemalloc (tempos sem overhead).")
+    parser.add_argument('--saida', help="Grava os resultados em JSON.")
+    parser.add_argument('--partida', type=int, metavar='N', help="Só mede a partida em N processos novos.")
+    parser.add_argument('--com-aquecimento', action='store_true', help="Mede também com o aquecimento em segundo plano ligado.")
+    args = parser.parse_args(argv)
+
+    if args.partida:
+        resultado = medir_partida(args.partida, args.timeout, args.com_aquecimento)
+        print(
+            f"partida (mediana de {args.partida}): importações {resultado['importacao_ms']:.1f} ms | "
+            f"1º conteúdo visível {resultado['primeira_pintura_ms']:.1f} ms | rerun {resultado['total_ms']:.1f} ms"
+        )
+        if args.saida:
+            with open(args.saida, 'w', encoding='utf-8') as arquivo:
+                json.dump({'partida': resultado}, arquivo, ensure_ascii=False, indent=1)
+        return resultado
+
+    memoria = not args.sem_memoria
+    if memoria:
+        tracemalloc.start()
+    # Sempre o caminho de processamento (snapshot não se aplica a dados sintéticos)
+    modelo_dados.USAR_SNAPSHOT = False
+    diretorio_original = modelo_dados.DIRETORIO_DADOS
+    aquecimento_original = aquecimento.ATIVO
+
+    resultados = {}
+    with tempfile.TemporaryDirectory(prefix='app1_bench_') as temporario:
+        for escala in args.escalas:
+            dimensoes = interpretar_escala(escala)
+            if dimensoes is None:
+                # Diretório vazio -> dados embutidos
+                modelo_dados.DIRETORIO_DADOS = os.path.join(temporario, 'vazio')
+            else:
+                modelo_dados.DIRETORIO_DADOS = os.path.join(temporario, escala)
+                gerar_dados_sinteticos(*dimensoes, modelo_dados.DIRETORIO_DADOS)
+            for com_aquecimento in ([False, True] if args.com_aquecimento else [False]):
+                # Lido pela página a cada rerun (from aquecimento import ATIVO)
+                aquecimento.ATIVO = com_aquecimento
+                cenario = escala + ('+aquecimento' if com_aquecimento else '')
+                resultados[cenario] = resumir(executar_roteiro(args.repeticoes, args.timeout, memoria))
+                aguardar_aquecimento()
+
+                print(f"\n== Escala {cenario} ==")
+                print(f"{'interação':<14}{'n':>4}{'p50 (ms)':>12}{'p95 (ms)':>12}{'pico (MB)':>12}")
+                for nome, r in resultados[cenario].items():
+                    pico = f"{r['pico_mb']:.1f}" if r['pico_mb'] is not None else '-'
+                    print(f"{nome:<14}{r['n']:>4}{r['p50_ms']:>12.1f}{r['p95_ms']:>12.1f}{pico:>12}")
+    modelo_dados.DIRETORIO_DADOS = diretorio_original
+    aquecimento.ATIVO = aquecimento_original
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultados, arquivo, ensure_ascii=False, indent=1)
+    return resultados
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+"""Exportação em lote, sem navegador: gráficos HTML e tabelas de cada cenário
+para uma lista de conjuntos de países.
+
+    python exportacao.py                                   # conjunto 'principais'
+    python exportacao.py --conjuntos conjuntos_exportacao.json --processos 8
+    python exportacao.py --formatos csv parquet --destino relatorio
+    python exportacao.py --sinteticos 300                  # 300 conjuntos aleatórios (medição)
+
+O arquivo de conjuntos é um JSON {"nome": ["País", ...]}. Para cada conjunto
+e cada posição da linha do tempo são gravados em <destino>/<nome>/:
+
+* grafico_<rótulo>.html     o mesmo gráfico da página (graficos.py)
+* percentuais_<rótulo>.csv  participações (%) do cenário
+* tkm_<ano>.csv             tkm absoluto (anos com dado de tkm)
+* variacao.csv              todos os pares de anos: variação (p.p.) e CAGR do tkm
+
+O plotly.js é gravado uma única vez em <destino>/plotly.min.js.
+
+Incremental: manifesto.json guarda, por conjunto, a impressão digital das
+entradas (valores dos países do conjunto, eixos, formatos e código do
+gráfico). Conjuntos inalterados, com todos os arquivos presentes, são
+pulados. Os demais são distribuídos por um ProcessPoolExecutor; cada
+processo carrega os cubos uma única vez.
+"""
+import os
+import re
+import csv
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from modelo_dados import (
+    assinatura_fonte,
+    bloco_cenario,
+    carregar_cubo_percentuais,
+    carregar_modelo_tkm,
+    carregar_variacoes,
+    extensoes_fonte,
+    ordenar_paises,
+    rotulos_cenarios,
+)
+from graficos import PAISES_PRINCIPAIS, dados_cenario, html_figura, recorte_grafico
+
+# Muda quando o layout dos arquivos exportados muda (força nova exportação)
+VERSAO_EXPORTACAO = 1
+CAMINHO_GRAFICOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'graficos.py')
+DESTINO_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exportacao')
+NOME_VALIDO = re.compile(r'^[\w.-]+$')
+
+# ==============================================================================
+# 1. CONJUNTOS E IMPRESSÃO DIGITAL DAS ENTRADAS
+# ==============================================================================
+def ler_conjuntos(caminho):
+    """{nome: [países]} do arquivo JSON (ou só 'principais', sem arquivo)."""
+    if caminho is None:
+        return {'principais': list(PAISES_PRINCIPAIS)}
+    with open(caminho, encoding='utf-8') as arquivo:
+        conjuntos = json.load(arquivo)
+    invalidos = [nome for nome in conjuntos if not NOME_VALIDO.match(nome)]
+    if invalidos:
+        raise ValueError(f"Nomes de conjunto inválidos (use letras, números, '.', '_' ou '-'): {invalidos}")
+    return conjuntos
+
+def conjuntos_sinteticos(n, cubo, semente=0):
+    """n conjuntos aleatórios de 3 a 15 países (medição de escala)."""
+    rng = random.Random(semente)
+    paises = list(cubo.paises)
+    return {f"sintetico_{i:04d}": rng.sample(paises, rng.randint(3, min(15, len(paises)))) for i in range(n)}
+
+def impressao_conjunto(cubo, cubo_tkm, paises, parametros):
+    """Hash das entradas de um conjunto: só os valores dos seus países.
+
+    Uma revisão que não toca os países do conjunto não o reexporta.
+    """
+    hash_entradas = hashlib.sha1(json.dumps([VERSAO_EXPORTACAO, paises, parametros], ensure_ascii=False).encode('utf-8'))
+    with open(CAMINHO_GRAFICOS, 'rb') as arquivo:
+        hash_entradas.update(arquivo.read())
+    for c, lista in [(cubo, paises), (cubo_tkm, [p for p in paises if p in cubo_tkm.idx_pais])]:
+        linhas = [c.idx_pais[p] for p in lista]
+        hash_entradas.update(repr((c.anos, c.modais, lista)).encode('utf-8'))
+        hash_entradas.update(np.ascontiguousarray(c.valores[linhas]).tobytes())
+        if c.inicial is not None:
+            hash_entradas.update(np.ascontiguousarray(c.inicial[linhas]).tobytes())
+    return hash_entradas.hexdigest()
+
+def ler_manifesto_exportacao(destino):
+    try:
+        with open(os.path.join(destino, 'manifesto.json'), encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return {'conjuntos': {}}
+
+def gravar_manifesto_exportacao(destino, manifesto):
+    caminho = os.path.join(destino, 'manifesto.json')
+    with open(caminho + '.tmp', 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo, ensure_ascii=False, indent=1)
+    os.replace(caminho + '.tmp', caminho)
+
+# ==============================================================================
+# 2. EXPORTAÇÃO DE UM CONJUNTO (EXECUTADA NOS PROCESSOS)
+# ==============================================================================
+# Cubos do processo de exportação (carregados uma vez, em iniciar_processo)
+_dados = {}
+
+def iniciar_processo(assinatura_pct, assinatura_tkm):
+    """Carrega os cubos e as variações no processo (snapshot quando disponível)."""
+    _dados['cubo'] = carregar_cubo_percentuais(assinatura_pct)
+    _dados['tkm'] = carregar_modelo_tkm(assinatura_tkm)
+    _dados['variacoes'] = carregar_variacoes(assinatura_pct, assinatura_tkm)
+
+def linhas_tabela(rotulos, bloco, casas=None):
+    """Linhas [rótulo, valores...] de um bloco 2D; NaN vira célula vazia."""
+    bloco = np.asarray(bloco, dtype=float)
+    if casas is not None:
+        bloco = np.round(bloco, casas)
+    valores = np.where(np.isnan(bloco), None, bloco).tolist()
+    return [[rotulo, *linha] for rotulo, linha in zip(rotulos, valores)]
+
+def gravar_tabela(colunas, linhas, caminho_base, formatos):
+    """Grava a tabela em cada formato; devolve os caminhos dos arquivos.
+
+    CSV direto pelo módulo csv (sem DataFrame por tabela pequena); o
+    DataFrame só é montado para o Parquet.
+    """
+    arquivos = []
+    for formato in formatos:
+        caminho = f"{caminho_base}.{formato}"
+        if formato == 'parquet':
+            import pandas as pd
+            pd.DataFrame(linhas, columns=colunas).to_parquet(caminho, index=False)
+        else:
+            with open(caminho, 'w', encoding='utf-8', newline='') as arquivo:
+                escritor = csv.writer(arquivo, lineterminator='\n')
+                escritor.writerow(colunas)
+                escritor.writerows(linhas)
+        arquivos.append(caminho)
+    return arquivos
+
+def gravar_recorte(cubo, paises, bloco, caminho_base, formatos, casas=None):
+    """Recorte País x Modal (linhas sem nenhum valor ficam de fora, como em fatia_cubo)."""
+    paises = [p for p in paises if p in cubo.idx_pais]
+    linhas = [cubo.idx_pais[p] for p in paises]
+    bloco = np.asarray(bloco[linhas], dtype=float)
+    com_dado = ~np.isnan(bloco).all(axis=1)
+    if not com_dado.any():
+        return []
+    rotulos = [p for p, tem in zip(paises, com_dado) if tem]
+    return gravar_tabela(['Pais', *cubo.modais], linhas_tabela(rotulos, bloco[com_dado], casas), caminho_base, formatos)
+
+def tabela_variacao(cubo, variacoes, paises):
+    """Todos os pares (base < comparação): País, Modal, anos, p.p. e CAGR (%)."""
+    linhas = np.array([cubo.idx_pais[p] for p in paises], dtype=np.intp)
+    pares = np.flatnonzero(variacoes.base < variacoes.comparacao)
+    base, comparacao = variacoes.base[pares], variacoes.comparacao[pares]
+    # País x Par x Modal, achatado na ordem País > Par > Modal
+    delta = np.round(variacoes.delta_pp[np.ix_(linhas, pares)].astype(float).ravel(), 2)
+    cagr = np.round(variacoes.cagr_tkm[np.ix_(linhas, pares)].astype(float).ravel() * 100, 4)
+    n_pares, n_modais = len(base), len(cubo.modais)
+    anos = np.asarray(variacoes.anos)
+    colunas = [
+        np.repeat(paises, n_pares * n_modais).tolist(),
+        np.tile(cubo.modais, len(linhas) * n_pares).tolist(),
+        np.tile(np.repeat(anos[base], n_modais), len(linhas)).tolist(),
+        np.tile(np.repeat(anos[comparacao], n_modais), len(linhas)).tolist(),
+        delta.tolist(),
+        np.where(np.isnan(cagr), None, cagr).tolist(),
+    ]
+    validas = ~np.isnan(delta)
+    return (
+        ['Pais', 'Modal', 'Ano base', 'Ano comparação', 'Variação (p.p.)', 'CAGR tkm (%)'],
+        [linha for linha, valida in zip(zip(*colunas), validas) if valida],
+    )
+
+def exportar_conjunto(nome, paises, destino, formatos, plotlyjs):
+    """Gráficos e tabelas de todas as posições da linha do tempo de um conjunto."""
+    inicio = time.perf_counter()
+    cubo, cubo_tkm, variacoes = _dados['cubo'], _dados['tkm'], _dados['variacoes']
+    pasta = os.path.join(destino, nome)
+    os.makedirs(pasta, exist_ok=True)
+    arquivos = []
+
+    # Mesmo recorte e mesma figura da página (dados_figura), serializada
+    # direto do dicionário, sem passar por um objeto plotly por posição
+    for rotulo in rotulos_cenarios(cubo):
+        df_plot = recorte_grafico(cubo, paises, rotulo)
+        if df_plot.empty:
+            continue
+        caminho = os.path.join(pasta, f"grafico_{rotulo}.html")
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(html_figura(dados_cenario(df_plot, rotulo, paises), plotlyjs))
+        arquivos.append(caminho)
+        arquivos += gravar_recorte(cubo, paises, bloco_cenario(cubo, rotulo), os.path.join(pasta, f"percentuais_{rotulo}"), formatos, casas=2)
+
+    for j, ano in enumerate(cubo_tkm.anos):
+        arquivos += gravar_recorte(cubo_tkm, paises, cubo_tkm.valores[:, j], os.path.join(pasta, f"tkm_{ano}"), formatos)
+
+    arquivos += gravar_tabela(*tabela_variacao(cubo, variacoes, paises), os.path.join(pasta, "variacao"), formatos)
+    return nome, [os.path.relpath(a, destino) for a in arquivos], time.perf_counter() - inicio
+
+# ==============================================================================
+# 3. ORQUESTRAÇÃO (INCREMENTAL, EM PARALELO)
+# ==============================================================================
+def preparar_plotlyjs(destino, modo):
+    """Referência ao plotly.js nos HTML: arquivo único no destino ('pasta') ou CDN."""
+    from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+    versao = get_plotlyjs_version()
+    if modo == 'cdn':
+        return f"https://cdn.plot.ly/plotly-{versao}.min.js", versao
+    caminho = os.path.join(destino, 'plotly.min.js')
+    if not os.path.isfile(caminho) or ler_manifesto_exportacao(destino).get('plotlyjs') != versao:
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(get_plotlyjs())
+    return '../plotly.min.js', versao
+
+def exportar(conjuntos, destino=None, formatos=('csv',), processos=None, plotlyjs='pasta', forcar=False, progresso=None):
+    """Exporta os conjuntos pendentes; devolve um resumo da execução."""
+    inicio = time.perf_counter()
+    destino = destino or DESTINO_PADRAO
+    if 'parquet' in formatos and '.parquet' not in extensoes_fonte():
+        raise RuntimeError("Exportar em Parquet requer pyarrow ou fastparquet.")
+    os.makedirs(destino, exist_ok=True)
+
+    assinatura_pct, assinatura_tkm = assinatura_fonte('percentuais'), assinatura_fonte('tkm')
+    iniciar_processo(assinatura_pct, assinatura_tkm)
+    cubo, cubo_tkm = _dados['cubo'], _dados['tkm']
+    referencia_js, versao_js = preparar_plotlyjs(destino, plotlyjs)
+    parametros = [list(formatos), referencia_js]
+
+    manifesto = ler_manifesto_exportacao(destino)
+    pendentes, pulados = [], 0
+    for nome, paises in conjuntos.items():
+        desconhecidos = [p for p in paises if p not in cubo.idx_pais]
+        if desconhecidos:
+            raise ValueError(f"Conjunto {nome}: países desconhecidos {desconhecidos}")
+        paises = ordenar_paises(set(paises), cubo)
+        impressao = impressao_conjunto(cubo, cubo_tkm, paises, parametros)
+        anterior = manifesto['conjuntos'].get(nome)
+        if (
+            not forcar and anterior is not None and anterior['impressao'] == impressao
+            and all(os.path.isfile(os.path.join(destino, a)) for a in anterior['arquivos'])
+        ):
+            pulados += 1
+            continue
+        pendentes.append((nome, paises, impressao))
+
+    impressoes = {nome: impressao for nome, _, impressao in pendentes}
+    tempos = []
+
+    def registrar(resultado):
+        nome, arquivos, segundos = resultado
+        manifesto['conjuntos'][nome] = {'impressao': impressoes[nome], 'arquivos': arquivos}
+        tempos.append(segundos)
+        if progresso:
+            progresso(len(tempos), len(pendentes), nome)
+
+    try:
+        if processos == 1 or len(pendentes) <= 1:
+            for nome, paises, _ in pendentes:
+                registrar(exportar_conjunto(nome, paises, destino, formatos, referencia_js))
+        elif pendentes:
+            with ProcessPoolExecutor(
+                max_workers=processos, initializer=iniciar_processo, initargs=(assinatura_pct, assinatura_tkm)
+            ) as executor:
+                futuros = [
+                    executor.submit(exportar_conjunto, nome, paises, destino, formatos, referencia_js)
+                    for nome, paises, _ in pendentes
+                ]
+                for futuro in as_completed(futuros):
+                    registrar(futuro.result())
+    finally:
+        # Mesmo se interrompido, os conjuntos concluídos não são refeitos
+        manifesto['plotlyjs'] = versao_js
+        gravar_manifesto_exportacao(destino, manifesto)
+
+    return {
+        'exportados': len(tempos),
+        'pulados': pulados,
+        'arquivos': sum(len(manifesto['conjuntos'][nome]['arquivos']) for nome in impressoes),
+        'segundos': time.perf_counter() - inicio,
+        'segundos_conjuntos': sum(tempos),
+    }
+
+# ==============================================================================
+# 4. LINHA DE COMANDO
+# ==============================================================================
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Exporta gráficos HTML e tabelas de todos os cenários por conjunto de países.")
+    parser.add_argument('--conjuntos', default=None, help="JSON {nome: [países]} (padrão: só os países principais).")
+    parser.add_argument('--sinteticos', type=int, metavar='N', help="Usa N conjuntos aleatórios (medição de escala).")
+    parser.add_argument('--destino', default=None, help=f"Diretório de saída (padrão: {DESTINO_PADRAO}).")
+    parser.add_argument('--formatos', nargs='+', default=['csv'], choices=['csv', 'parquet'])
+    parser.add_argument('--processos', type=int, default=None, help="Processos em paralelo (padrão: núcleos da máquina).")
+    parser.add_argument('--plotlyjs', default='pasta', choices=['pasta', 'cdn'], help="plotly.js em arquivo único no destino ou via CDN.")
+    parser.add_argument('--forcar', action='store_true', help="Reexporta mesmo os conjuntos inalterados.")
+    args = parser.parse_args()
+
+    if args.sinteticos:
+        conjuntos = conjuntos_sinteticos(args.sinteticos, carregar_cubo_percentuais(assinatura_fonte('percentuais')))
+    else:
+        conjuntos = ler_conjuntos(args.conjuntos)
+
+    def mostrar_progresso(feitos, total, nome):
+        print(f"\r{feitos}/{total} conjuntos ({nome})", end='', file=sys.stderr, flush=True)
+
+    resumo = exportar(conjuntos, args.destino, args.formatos, args.processos, args.plotlyjs, args.forcar, mostrar_progresso)
+    print(file=sys.stderr)
+    print(
+        f"{resumo['exportados']} conjuntos exportados ({resumo['arquivos']} arquivos), {resumo['pulados']} inalterados | "
+        f"{resumo['segundos']:.2f} s (soma por conjunto {resumo['segundos_conjuntos']:.2f} s)"
+    )
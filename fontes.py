@@ -0,0 +1,293 @@
+"""Adaptadores das fontes oficiais (um por formato de órgão) e carga concorrente.
+
+Cada adaptador lê a publicação do órgão no formato original (códigos,
+unidades e idioma próprios) e devolve a tabela longa normalizada
+Pais, Modal, Ano, tkm (bilhões de tkm). As fontes são lidas em paralelo
+(ThreadPoolExecutor): o tempo de atualização fica limitado pela fonte mais
+lenta, não pela soma. A leitura de cada fonte fica em cache pela assinatura
+do arquivo e só é refeita quando o arquivo muda.
+
+A consolidação grava tkm.csv e percentuais.csv no diretório de dados do
+modelo_dados (mesmo layout dos dados embutidos); a página detecta a troca
+pela assinatura dos arquivos, sem reiniciar o servidor.
+
+    python fontes.py                    # fontes_locais/ -> dados/
+    python fontes.py --latencia 0.5     # simula a espera de rede de cada fonte
+
+Os arquivos de fontes_locais/ são substitutos locais das publicações (sem
+rede), no mesmo formato de cada órgão.
+"""
+import os
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+import modelo_dados
+from modelo_dados import (
+    MEDIDAS_PERCENTUAIS,
+    MODAIS_TKM,
+    assinatura_arquivo,
+    normalizar_chaves_pais,
+    normalizar_para_ordenacao,
+)
+
+DIRETORIO_FONTES = os.environ.get(
+    'APP1_FONTES_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fontes_locais')
+)
+# Tonelada curta-milha (EUA) -> tonelada métrica-quilômetro
+TON_MILHA_PARA_TKM = 1.45997
+
+_LOGGER = logging.getLogger(__name__)
+
+# ==============================================================================
+# 1. ADAPTADORES (UM POR FORMATO DE ÓRGÃO)
+# ==============================================================================
+def normalizar_longa(pais, modal, ano, tkm):
+    """Tabela longa Pais, Modal, Ano, tkm; componentes do mesmo modal são somados
+    (ex.: cabotagem + hidroviário = Aquaviário).
+    """
+    df = pd.DataFrame({
+        'Pais': normalizar_chaves_pais(pais) if isinstance(pais, pd.Series) else pais,
+        'Modal': modal,
+        'Ano': pd.to_numeric(ano).astype(int),
+        'tkm': pd.to_numeric(tkm, errors='coerce'),
+    }).dropna(subset=['Modal'])
+    return df.groupby(['Pais', 'Modal', 'Ano'], sort=False, as_index=False)['tkm'].sum(min_count=1)
+
+def empilhar_anos(df, coluna_modo, modos, pais, fator):
+    """Linhas = modos, colunas = anos -> tabela longa (modos fora do mapa são descartados)."""
+    anos = [c for c in df.columns if str(c).strip().isdigit()]
+    df = df[df[coluna_modo].isin(modos)].melt(id_vars=[coluna_modo], value_vars=anos, var_name='Ano', value_name='tkm')
+    return normalizar_longa(pais, df[coluna_modo].map(modos), df['Ano'].astype(str).str.strip(), df['tkm'] * fator)
+
+# --- Eurostat: SDMX-TSV, milhões de tkm, flags nos valores (':' = ausente) ---
+GEO_EUROSTAT = {
+    'AT': 'Áustria', 'BE': 'Bélgica', 'BG': 'Bulgária', 'CZ': 'República Tcheca',
+    'DE': 'Alemanha', 'DK': 'Dinamarca', 'ES': 'Espanha', 'FI': 'Finlândia',
+    'FR': 'França', 'HR': 'Croácia', 'HU': 'Hungria', 'IT': 'Itália',
+    'LU': 'Luxemburgo', 'NL': 'Holanda', 'NO': 'Noruega', 'PL': 'Polônia',
+    'RO': 'Romênia', 'RS': 'Sérvia', 'SE': 'Suécia', 'SK': 'Eslováquia',
+    'TR': 'Turquia', 'UK': 'Reino Unido',
+}
+MODOS_EUROSTAT = {'RAIL': 'Ferroviário', 'ROAD': 'Rodoviário', 'IWW': 'Aquaviário', 'SEA': 'Aquaviário'}
+
+def ler_eurostat(caminho):
+    df = pd.read_csv(caminho, sep='\t', dtype=str)
+    chaves = df.iloc[:, 0].str.split(',', expand=True)
+    chaves.columns = df.columns[0].split('\\')[0].split(',')
+    # "51100 p" -> 51100; ": " -> NaN
+    valores = df.iloc[:, 1:].apply(lambda coluna: pd.to_numeric(coluna.str.strip().str.split(' ').str[0], errors='coerce'))
+    valores.columns = [c.strip() for c in valores.columns]
+    df = pd.concat([chaves, valores], axis=1)
+    df = df[(df['unit'] == 'MIO_TKM') & df['geo'].isin(GEO_EUROSTAT)]
+    df = df.melt(id_vars=['tra_mode', 'geo'], value_vars=list(valores.columns), var_name='Ano', value_name='tkm')
+    return normalizar_longa(df['geo'].map(GEO_EUROSTAT), df['tra_mode'].map(MODOS_EUROSTAT), df['Ano'], df['tkm'] / 1000)
+
+# --- EPL / Ministério dos Transportes (Brasil): longa, ';' e vírgula decimal, bilhões de TKU ---
+MODOS_EPL = {'Rodoviário': 'Rodoviário', 'Ferroviário': 'Ferroviário', 'Cabotagem': 'Aquaviário', 'Hidroviário': 'Aquaviário'}
+
+def ler_epl(caminho):
+    df = pd.read_csv(caminho, sep=';', decimal=',')
+    return normalizar_longa('Brasil', df['Modo de transporte'].map(MODOS_EPL), df['Ano'], df['TKU (bilhões)'])
+
+# --- BTS (EUA): larga, milhões de ton-milhas (toneladas curtas) ---
+MODOS_BTS = {'Rail': 'Ferroviário', 'Truck': 'Rodoviário', 'Water': 'Aquaviário'}
+
+def ler_bts(caminho):
+    return empilhar_anos(pd.read_csv(caminho), 'Mode', MODOS_BTS, 'EUA', TON_MILHA_PARA_TKM / 1000)
+
+# --- NBSC (China): larga, anos decrescentes, 100 milhões de tkm, cabeçalho e rodapé ---
+MODOS_NBSC = {
+    'Freight Ton-kilometers of Railways(100 million ton-km)': 'Ferroviário',
+    'Freight Ton-kilometers of Highways(100 million ton-km)': 'Rodoviário',
+    'Freight Ton-kilometers of Waterways(100 million ton-km)': 'Aquaviário',
+}
+
+def ler_nbsc(caminho):
+    df = pd.read_csv(caminho, skiprows=2, skip_blank_lines=True)
+    df = df[~df['Indicators'].str.startswith('Source:', na=False)]
+    return empilhar_anos(df, 'Indicators', MODOS_NBSC, 'China', 0.1)
+
+# --- Rosstat (Rússia): larga, ';' e vírgula decimal, bilhões de t-km, rótulos em russo ---
+MODOS_ROSSTAT = {
+    'Железнодорожный': 'Ferroviário',
+    'Автомобильный': 'Rodoviário',
+    'Морской': 'Aquaviário',
+    'Внутренний водный': 'Aquaviário',
+}
+
+def ler_rosstat(caminho):
+    return empilhar_anos(pd.read_csv(caminho, sep=';', decimal=','), 'Вид транспорта', MODOS_ROSSTAT, 'Rússia', 1.0)
+
+# --- Statistics Canada: longa (REF_DATE, VALUE), fator de escala por linha ---
+MODOS_STATCAN = {'Rail': 'Ferroviário', 'Trucking': 'Rodoviário', 'Marine': 'Aquaviário'}
+ESCALAS_STATCAN = {'units': 1e-9, 'thousands': 1e-6, 'millions': 1e-3, 'billions': 1.0}
+
+def ler_statcan(caminho):
+    df = pd.read_csv(caminho)
+    df = df[(df['GEO'] == 'Canada') & (df['UOM'] == 'Tonne-kilometres')]
+    return normalizar_longa(
+        'Canadá', df['Mode of transport'].map(MODOS_STATCAN), df['REF_DATE'],
+        df['VALUE'] * df['SCALAR_FACTOR'].map(ESCALAS_STATCAN)
+    )
+
+# --- Demais países: compilação manual no layout de tkm.csv (Pais, Modal, anos) ---
+def ler_compilacao(caminho):
+    df = pd.read_csv(caminho)
+    df = df.melt(id_vars=['Pais', 'Modal'], var_name='Ano', value_name='tkm')
+    return normalizar_longa(df['Pais'], df['Modal'].where(df['Modal'].isin(MODAIS_TKM)), df['Ano'], df['tkm'])
+
+class Adaptador(NamedTuple):
+    """Fonte oficial: rótulo (como na metodologia), arquivo local e leitor do formato."""
+    rotulo: str
+    arquivo: str
+    ler: Callable
+
+# Em caso de sobreposição (mesmo País x Modal x Ano), vale a primeira fonte
+ADAPTADORES = {
+    'eurostat': Adaptador('Eurostat', 'eurostat_tkm_modos.tsv', ler_eurostat),
+    'epl': Adaptador('EPL / Ministério dos Transportes', 'epl_brasil.csv', ler_epl),
+    'bts': Adaptador('Bureau of Transportation Statistics (BTS)', 'bts_ton_miles.csv', ler_bts),
+    'nbsc': Adaptador('National Bureau of Statistics of China (NBSC)', 'nbsc_china.csv', ler_nbsc),
+    'rosstat': Adaptador('Rosstat', 'rosstat_russia.csv', ler_rosstat),
+    'statcan': Adaptador('Statistics Canada', 'statcan_canada.csv', ler_statcan),
+    'demais': Adaptador('Demais países (compilação manual)', 'compilacao_demais.csv', ler_compilacao),
+}
+
+# ==============================================================================
+# 2. LEITURA CONCORRENTE COM CACHE POR FONTE
+# ==============================================================================
+class ResultadoFonte(NamedTuple):
+    """Leitura de uma fonte: tabela longa (None em caso de erro), tempo e origem."""
+    nome: str
+    tabela: Optional[pd.DataFrame]
+    segundos: float
+    em_cache: bool
+    erro: Optional[str] = None
+
+# Última leitura de cada fonte: nome -> (assinatura do arquivo, tabela longa)
+_leituras = {}
+_trava_leituras = threading.Lock()
+
+def limpar_leituras():
+    """Esquece as leituras em cache das fontes."""
+    with _trava_leituras:
+        _leituras.clear()
+
+def ler_adaptador(nome, diretorio, latencia=0.0):
+    """Lê uma fonte (ou reaproveita a leitura anterior, se o arquivo não mudou).
+
+    Qualquer erro do adaptador (arquivo ausente, layout inesperado, bug) é
+    registrado no log e a fonte volta marcada com erro; as demais seguem.
+    """
+    adaptador = ADAPTADORES[nome]
+    inicio = time.perf_counter()
+    try:
+        caminho = os.path.join(diretorio, adaptador.arquivo)
+        assinatura = assinatura_arquivo(caminho)
+        with _trava_leituras:
+            anterior = _leituras.get(nome)
+        if anterior is not None and anterior[0] == assinatura:
+            return ResultadoFonte(nome, anterior[1], time.perf_counter() - inicio, True)
+        if latencia:
+            # Espera de rede simulada (as fontes locais não têm download)
+            time.sleep(latencia)
+        tabela = adaptador.ler(caminho)
+    except Exception as erro:
+        _LOGGER.warning("Fonte '%s' não pôde ser lida", nome, exc_info=True)
+        return ResultadoFonte(nome, None, time.perf_counter() - inicio, False, f"{type(erro).__name__}: {erro}")
+    with _trava_leituras:
+        _leituras[nome] = (assinatura, tabela)
+    return ResultadoFonte(nome, tabela, time.perf_counter() - inicio, False)
+
+def ler_fontes(nomes=None, diretorio=None, latencia=0.0, max_workers=None):
+    """Lê as fontes em paralelo; resultados na ordem de ADAPTADORES."""
+    nomes = list(nomes or ADAPTADORES)
+    diretorio = diretorio or DIRETORIO_FONTES
+    with ThreadPoolExecutor(max_workers=max_workers or len(nomes), thread_name_prefix='fonte') as executor:
+        futuros = [executor.submit(ler_adaptador, nome, diretorio, latencia) for nome in nomes]
+    return [futuro.result() for futuro in futuros]
+
+# ==============================================================================
+# 3. CONSOLIDAÇÃO NO MODELO UNIFICADO
+# ==============================================================================
+def consolidar(resultados):
+    """Tabelas longas das fontes -> (tkm, percentuais) nos layouts de tkm.csv e percentuais.csv."""
+    longa = pd.concat([r.tabela for r in resultados if r.tabela is not None], ignore_index=True)
+    longa = longa.drop_duplicates(['Pais', 'Modal', 'Ano'], keep='first')
+
+    paises = sorted(longa['Pais'].unique(), key=normalizar_para_ordenacao)
+    anos = sorted(longa['Ano'].unique())
+    tkm = longa.pivot(index=['Pais', 'Modal'], columns='Ano', values='tkm')
+    tkm = tkm.reindex(index=pd.MultiIndex.from_product([paises, MODAIS_TKM], names=['Pais', 'Modal']), columns=anos)
+    # Conversões de unidade: 3 casas eliminam o ruído de ponto flutuante
+    tkm = tkm.round(3)
+
+    # Participação = tkm do modal / total dos três modais (ver metodologia)
+    valores = tkm.to_numpy(dtype=float).reshape(len(paises), len(MODAIS_TKM), len(anos))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        razoes = np.round(valores / np.nansum(valores, axis=1, keepdims=True), 6)
+    percentuais = pd.DataFrame(razoes.reshape(-1, len(anos)), index=tkm.index, columns=anos)
+    percentuais = percentuais.rename(index=MEDIDAS_PERCENTUAIS, level='Modal').rename_axis(['Pais', 'Combined measure'])
+
+    return (
+        tkm.rename(columns=str).reset_index(),
+        percentuais.rename(columns=str).reset_index(),
+    )
+
+def gravar_tabela(df, caminho):
+    """Grava o CSV de forma atômica (a página nunca lê um arquivo pela metade)."""
+    temporario = caminho + '.tmp'
+    df.to_csv(temporario, index=False)
+    os.replace(temporario, caminho)
+
+def atualizar_fontes(destino=None, diretorio=None, latencia=0.0, max_workers=None):
+    """Lê todas as fontes em paralelo e grava tkm.csv e percentuais.csv no destino.
+
+    Retorna (resultados por fonte, tempo total em segundos).
+    """
+    inicio = time.perf_counter()
+    resultados = ler_fontes(diretorio=diretorio, latencia=latencia, max_workers=max_workers)
+    if all(r.tabela is None for r in resultados):
+        raise RuntimeError("Nenhuma fonte pôde ser lida: " + "; ".join(f"{r.nome}: {r.erro}" for r in resultados))
+    tkm, percentuais = consolidar(resultados)
+
+    destino = destino or modelo_dados.DIRETORIO_DADOS
+    os.makedirs(destino, exist_ok=True)
+    gravar_tabela(tkm, os.path.join(destino, 'tkm.csv'))
+    gravar_tabela(percentuais, os.path.join(destino, 'percentuais.csv'))
+    return resultados, time.perf_counter() - inicio
+
+# ==============================================================================
+# 4. LINHA DE COMANDO
+# ==============================================================================
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Lê as fontes oficiais em paralelo e consolida tkm.csv e percentuais.csv.")
+    parser.add_argument('--fontes', default=None, help="Diretório dos arquivos das fontes (padrão: APP1_FONTES_DIR).")
+    parser.add_argument('--destino', default=None, help="Diretório de dados de saída (padrão: APP1_DADOS_DIR).")
+    parser.add_argument('--latencia', type=float, default=0.0, help="Espera de rede simulada por fonte (s).")
+    parser.add_argument('--repeticoes', type=int, default=1, help="Atualizações seguidas (a partir da 2ª, leituras em cache).")
+    args = parser.parse_args()
+
+    for rodada in range(args.repeticoes):
+        resultados, total = atualizar_fontes(args.destino, args.fontes, args.latencia)
+        print(f"\n== Atualização {rodada + 1} ==")
+        print(f"{'fonte':<48}{'linhas':>8}{'tempo (ms)':>12}  origem")
+        for r in resultados:
+            rotulo = ADAPTADORES[r.nome].rotulo
+            if r.erro:
+                print(f"{rotulo:<48}{'-':>8}{r.segundos * 1000:>12.1f}  ERRO {r.erro}")
+            else:
+                print(f"{rotulo:<48}{len(r.tabela):>8}{r.segundos * 1000:>12.1f}  {'cache' if r.em_cache else 'arquivo'}")
+        falhas = [r.nome for r in resultados if r.erro]
+        if falhas:
+            print(f"FALHAS: {len(falhas)} de {len(resultados)} fontes ({', '.join(falhas)}); os dados dessas fontes ficaram fora da consolidação")
+        print(f"total {total * 1000:.1f} ms | soma das fontes {sum(r.segundos for r in resultados) * 1000:.1f} ms | "
+              f"mais lenta {max(r.segundos for r in resultados) * 1000:.1f} ms")
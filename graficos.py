@@ -0,0 +1,324 @@
+"""Gráfico de bolhas do App1: cores, dados visuais e construção da figura.
+
+Usado pela página (App1_Final.py) e pela exportação em lote (exportacao.py).
+O plotly só é importado ao construir uma figura. Seleções acima de
+LIMITE_SELECAO_GRANDE países usam construir_figura_grande (WebGL).
+"""
+import os
+import functools
+
+import numpy as np
+import pandas as pd
+
+from modelo_dados import fatia_cubo
+
+# ==============================================================================
+# 1. CORES E PAÍSES PRINCIPAIS
+# ==============================================================================
+# Cores dos Países
+CORES_PAISES = {
+    'Alemanha': '#FFCE00', 'Bélgica': '#4B0082', 'Brasil': '#009739',
+    'Canadá': '#FF0000', 'China': '#DAA520', 'Dinamarca': '#C8102E',
+    'EUA': '#002868', 'França': '#002395', 'Hungria': '#436F4D',
+    'Rússia': '#FF8C00', 'Argentina': '#d8ccdd', 'Austrália': '#2e8ec1',
+    'Áustria': '#944d33', 'Azerbaijão': '#5cefcb', 'Bulgária': '#e408c2',
+    'Colômbia': '#561827', 'Coreia do Sul': '#a0e6c9', 'Croácia': '#183c9e',
+    'Eslováquia': '#94152a', 'Espanha': '#ab7538', 'Finlândia': '#0f8d9f',
+    'Holanda': '#fa3d56', 'Itália': '#831a10', 'Japão': '#9e96e7',
+    'Luxemburgo': '#d0970b', 'Reino Unido': '#0792fa', 'Romênia': '#8e83b0',
+    'Sérvia': '#a3d636', 'Suécia': '#b7bb68', 'Vietnã': '#4a110b',
+    'República Tcheca': '#11457e', 'Polônia': '#dc143c', 'México': '#006847',
+    'Turquia': '#e30a17', 'Chile': '#0039a6', 'Noruega': '#ba0c2f'
+}
+
+# Lista Principal de Países
+PAISES_PRINCIPAIS = [
+    'Alemanha', 'Bélgica', 'Brasil', 'Canadá', 'China',
+    'Dinamarca', 'EUA', 'França', 'Hungria', 'Rússia'
+]
+
+# Tamanho máximo da bolha (px) no gráfico
+TAMANHO_MAXIMO = 60
+COLUNAS_GRAFICO = ['Ferroviário (%)', 'Rodoviário (%)', 'Aquaviário (%)']
+TEMPLATE_HOVER = "<b>%{text}</b> (%{customdata[1]})<br><br>🚂 Ferroviário: %{x:.2~f}%<br>🚛 Rodoviário: %{y:.2~f}%<br>🚢 Aquaviário: %{customdata[0]}<extra></extra>"
+
+# ==============================================================================
+# 2. DADOS VISUAIS E FIGURA
+# ==============================================================================
+def formatar_pct_vetor(valores):
+    """Rótulos de percentual em lote: inteiros sem casas, demais com 2 casas."""
+    valores = np.asarray(valores, dtype=float)
+    validos = ~np.isnan(valores)
+    seguros = np.where(validos, valores, 0.0)
+    inteiros = seguros == np.trunc(seguros)
+    texto = np.where(
+        inteiros,
+        np.char.mod('%d%%', np.trunc(seguros).astype(np.int64)),
+        np.char.mod('%.2f%%', seguros),
+    )
+    return np.where(validos, texto, '-').astype(object)
+
+def preparar_dados_grafico(df_plot):
+    """Nova tabela com as colunas visuais: tamanho da bolha e texto do tooltip.
+
+    Não altera df_plot (que pode vir de dados compartilhados entre sessões).
+    """
+    aquaviario = df_plot['Aquaviário (%)'].to_numpy()
+    return df_plot.assign(
+        Tamanho_Visual=np.where(aquaviario < 1, 1, aquaviario),
+        Aquaviário_Texto=formatar_pct_vetor(aquaviario),
+    )
+
+
+def argumentos_quadro(duracao):
+    """Opções de Plotly.animate dos botões e do slider (as mesmas do px)."""
+    return {
+        "frame": {"duration": duracao, "redraw": False}, "mode": "immediate",
+        "fromcurrent": True, "transition": {"duration": duracao, "easing": "linear"},
+    }
+
+@functools.lru_cache(maxsize=None)
+def modelo_layout():
+    """Template plotly_white já expandido (validado uma vez por processo)."""
+    import plotly.io as pio
+
+    return pio.templates['plotly_white'].to_plotly_json()
+
+def cores_bolhas(paises):
+    """Cor por país, na ordem dos traces: CORES_PAISES e, para os demais, o
+    colorway do template a partir das cores fixas (como no px.scatter)."""
+    sequencia = modelo_layout()['layout']['colorway']
+    cores = dict(CORES_PAISES)
+    for pais in paises:
+        if pais not in cores:
+            cores[pais] = sequencia[len(cores) % len(sequencia)]
+    return cores
+
+def dados_figura(df_plot, titulo, paises, animado=False):
+    """Gráfico de bolhas como dicionário plotly (data, layout e, animado, frames).
+
+    Um trace por país, na ordem de paises, com as mesmas cores, hover e
+    escala de bolha do px.scatter. Montado direto dos arrays, sem o custo
+    do px nem da validação do plotly por figura: a exportação em lote
+    serializa um por posição da linha do tempo.
+    """
+    nomes = df_plot['Pais'].astype(object).to_numpy()
+    quadros = df_plot['Ano'].astype(str).to_numpy(dtype=object) if animado else np.zeros(len(df_plot), dtype=object)
+    # Linhas de cada (quadro, país), na ordem do df_plot (poucas: seleções
+    # grandes vão para construir_figura_grande)
+    linhas = {}
+    for i, chave in enumerate(zip(quadros, nomes)):
+        linhas.setdefault(chave, []).append(i)
+    presentes = list(dict.fromkeys(nomes))
+    ordem = [p for p in paises if p in set(presentes)] + [p for p in presentes if p not in set(paises)]
+    cores = cores_bolhas(ordem)
+
+    x = df_plot['Ferroviário (%)'].to_numpy()
+    y = df_plot['Rodoviário (%)'].to_numpy()
+    tamanho = df_plot['Tamanho_Visual'].to_numpy()
+    customdata = np.column_stack([df_plot['Aquaviário_Texto'].to_numpy(dtype=object), df_plot['Ano'].to_numpy(dtype=object)])
+    # Área da bolha proporcional ao aquaviário; a maior do gráfico com TAMANHO_MAXIMO px
+    sizeref = float(tamanho.max()) / TAMANHO_MAXIMO ** 2
+
+    def tracos(quadro):
+        return [
+            {
+                'type': 'scatter', 'x': x[posicoes], 'y': y[posicoes], 'text': nomes[posicoes],
+                'customdata': customdata[posicoes], **({'ids': nomes[posicoes]} if animado else {}),
+                'name': pais, 'legendgroup': pais, 'showlegend': True, 'mode': 'markers+text',
+                'orientation': 'v', 'xaxis': 'x', 'yaxis': 'y', 'textposition': 'top center',
+                'hovertemplate': TEMPLATE_HOVER,
+                'marker': {
+                    'color': cores[pais], 'size': tamanho[posicoes], 'sizemode': 'area', 'sizeref': sizeref,
+                    'symbol': 'circle', 'line': {'width': 1, 'color': 'DarkSlateGrey'}, 'opacity': 0.9,
+                },
+            }
+            for pais in ordem
+            for posicoes in [linhas.get((quadro, pais))] if posicoes is not None
+        ]
+
+    layout = {
+        'template': modelo_layout(),
+        'title': {'text': f"<b>Cenário: {titulo}</b>"},
+        'xaxis': {'anchor': 'y', 'domain': [0.0, 1.0], 'title': {'text': "<b>Eixo X:</b> Participação Ferroviária (%)"}, 'range': [-5, 105], 'dtick': 10},
+        'yaxis': {'anchor': 'x', 'domain': [0.0, 1.0], 'title': {'text': "<b>Eixo Y:</b> Participação Rodoviária (%)"}, 'range': [-5, 105], 'dtick': 10},
+        'legend': {'title': {}, 'tracegroupgap': 0, 'itemsizing': 'constant', 'orientation': 'h', 'yanchor': 'top', 'y': -0.25, 'xanchor': 'center', 'x': 0.5},
+        'margin': {'b': 150},
+        'height': 650,
+        'showlegend': True,
+    }
+    if not animado:
+        return {'data': tracos(0), 'layout': layout}
+
+    rotulos = list(dict.fromkeys(quadros))
+    layout['updatemenus'] = [{
+        'buttons': [
+            {'args': [None, argumentos_quadro(500)], 'label': '&#9654;', 'method': 'animate'},
+            {'args': [[None], argumentos_quadro(0)], 'label': '&#9724;', 'method': 'animate'},
+        ],
+        'direction': 'left', 'pad': {'r': 10, 't': 70}, 'showactive': False, 'type': 'buttons',
+        'x': 0.1, 'xanchor': 'right', 'y': 0, 'yanchor': 'top',
+    }]
+    layout['sliders'] = [{
+        'active': 0, 'currentvalue': {'prefix': 'Ano='}, 'len': 0.9, 'pad': {'b': 10, 't': 60},
+        'steps': [{'args': [[rotulo], argumentos_quadro(0)], 'label': rotulo, 'method': 'animate'} for rotulo in rotulos],
+        'x': 0.1, 'xanchor': 'left', 'y': 0, 'yanchor': 'top',
+    }]
+    frames = [{'data': tracos(rotulo), 'name': rotulo} for rotulo in rotulos]
+    return {'data': frames[0]['data'], 'layout': layout, 'frames': frames}
+
+def construir_figura(df_plot, titulo, paises, animado=False):
+    """Gráfico de bolhas; com animado=True gera um quadro por ano (troca no navegador)."""
+    import plotly.graph_objects as go
+
+    # Dicionário montado por dados_figura, já no formato do plotly: sem revalidar
+    return go.Figure(dados_figura(df_plot, titulo, paises, animado), _validate=False)
+
+def recorte_grafico(cubo, paises, ano, rotulo=None):
+    """Dados do gráfico estático de uma posição: recorte do ano, em ordem de país.
+
+    rotulo vai na coluna Ano (padrão: o próprio ano; projeções usam o rótulo
+    da linha do tempo). Vazio se nenhum país tem dado no ano.
+    """
+    df_plot = fatia_cubo(cubo, paises, ano).reset_index().assign(Ano=ano if rotulo is None else rotulo)
+    if df_plot.empty:
+        return df_plot
+    return preparar_dados_grafico(df_plot.sort_values(by='Pais'))
+
+def dados_cenario(df_plot, rotulo, paises):
+    """Figura estática de uma posição, como dicionário (título com o número de países)."""
+    return dados_figura(df_plot, f"{rotulo} ({len(df_plot)} Países)", paises)
+
+def figura_cenario(df_plot, rotulo, paises):
+    """Figura estática de uma posição (a da página; a exportação usa dados_cenario)."""
+    return construir_figura(df_plot, f"{rotulo} ({len(df_plot)} Países)", paises)
+
+# ==============================================================================
+# 3. MODO DE SELEÇÃO GRANDE (WEBGL)
+# ==============================================================================
+# Acima deste número de países o SVG com um trace, um rótulo e uma entrada de
+# legenda por país fica lento no navegador; o gráfico passa a um único trace
+# WebGL, rótulos só para os maiores em tkm e busca de países fora do gráfico.
+LIMITE_SELECAO_GRANDE = int(os.environ.get('APP1_LIMITE_WEBGL', '150'))
+ROTULOS_SELECAO_GRANDE = 25
+# Lado (p.p.) da célula da grade ao agrupar bolhas sobrepostas
+CELULA_AGRUPAMENTO = 2.0
+NOMES_POR_GRUPO = 6
+
+def cores_pontos(paises_pontos, paises):
+    """Cor por ponto: CORES_PAISES ou, como no px, a sequência padrão pela ordem da seleção."""
+    import plotly.express as px
+
+    sequencia = px.colors.qualitative.Plotly
+    sem_cor = [p for p in paises if p not in CORES_PAISES]
+    posicao = dict(zip(sem_cor, range(len(sem_cor))))
+    return [CORES_PAISES.get(p) or sequencia[posicao.get(p, 0) % len(sequencia)] for p in paises_pontos]
+
+def agrupar_sobrepostas(df_plot, celula=CELULA_AGRUPAMENTO):
+    """Une os países da mesma célula da grade (Ferroviário x Rodoviário) em uma bolha.
+
+    Posição e aquaviário são médias ponderadas pelo tkm total (peso 1 sem
+    tkm); o nome vira "N países: A, B, …" com os maiores em tkm primeiro.
+    """
+    if df_plot.empty:
+        return df_plot
+    peso = np.where(df_plot['tkm_total'].to_numpy(dtype=float) > 0, df_plot['tkm_total'].to_numpy(dtype=float), 1.0)
+    df = df_plot.assign(
+        Pais=df_plot['Pais'].astype(object),
+        _peso=peso,
+        _celula_x=np.floor(df_plot['Ferroviário (%)'].to_numpy(dtype=float) / celula),
+        _celula_y=np.floor(df_plot['Rodoviário (%)'].to_numpy(dtype=float) / celula),
+    ).sort_values('_peso', ascending=False, kind='stable')
+    # Média ponderada só sobre os países com valor no modal
+    pesos = [f"_peso {coluna}" for coluna in COLUNAS_GRAFICO]
+    for coluna, coluna_peso in zip(COLUNAS_GRAFICO, pesos):
+        df[coluna_peso] = np.where(df[coluna].notna(), df['_peso'], 0.0)
+        df[coluna] = df[coluna] * df[coluna_peso]
+    grupos = df.groupby(['_celula_x', '_celula_y'], sort=False)
+    df_grupos = grupos[COLUNAS_GRAFICO + pesos + ['tkm_total']].sum(min_count=1)
+    for coluna, coluna_peso in zip(COLUNAS_GRAFICO, pesos):
+        df_grupos[coluna] = df_grupos[coluna] / df_grupos[coluna_peso].where(df_grupos[coluna_peso] > 0)
+    nomes = grupos['Pais'].agg(list)
+    df_grupos['Pais'] = [
+        membros[0] if len(membros) == 1
+        else f"{len(membros)} países: {', '.join(membros[:NOMES_POR_GRUPO])}{', …' if len(membros) > NOMES_POR_GRUPO else ''}"
+        for membros in nomes
+    ]
+    df_grupos['Ano'] = df_plot['Ano'].iloc[0]
+    return preparar_dados_grafico(df_grupos.drop(columns=pesos).reset_index(drop=True))
+
+def construir_figura_grande(df_plot, titulo, paises, destaques=(), rotulos=ROTULOS_SELECAO_GRANDE, agrupar=False):
+    """Gráfico de bolhas em WebGL para seleções grandes.
+
+    df_plot precisa da coluna tkm_total (NaN sem tkm). Um único Scattergl
+    com cor por ponto, sem legenda; rótulo fixo só para os `rotulos` maiores
+    em tkm e para os `destaques` (contornados), os demais no hover.
+    """
+    import plotly.graph_objects as go
+
+    if agrupar:
+        # Destaques ficam fora dos grupos (continuam localizáveis pelo nome)
+        em_destaque = df_plot['Pais'].isin(list(destaques)).to_numpy()
+        df_plot = pd.concat([agrupar_sobrepostas(df_plot[~em_destaque]), df_plot[em_destaque]], ignore_index=True)
+    nomes = df_plot['Pais'].to_numpy(dtype=object)
+    x = df_plot['Ferroviário (%)'].to_numpy(dtype=float)
+    y = df_plot['Rodoviário (%)'].to_numpy(dtype=float)
+    # Sem aquaviário: bolha mínima (o ponto continua visível; hover mostra "-")
+    tamanho = np.nan_to_num(df_plot['Tamanho_Visual'].to_numpy(dtype=float), nan=1.0)
+    marcador = dict(sizemode='area', sizeref=float(tamanho.max()) / TAMANHO_MAXIMO ** 2)
+
+    destacados = np.flatnonzero(np.isin(nomes, list(destaques)))
+    ordem = np.argsort(-df_plot['tkm_total'].fillna(-np.inf).to_numpy(), kind='stable')
+    maiores = ordem[~np.isin(ordem, destacados)][:rotulos]
+
+    fig = go.Figure([
+        go.Scattergl(
+            x=x, y=y, text=nomes, mode='markers', name='Países',
+            customdata=np.column_stack([df_plot['Aquaviário_Texto'].to_numpy(dtype=object), df_plot['Ano'].astype(str).to_numpy(dtype=object)]),
+            marker=dict(size=tamanho, color=cores_pontos(nomes, paises), opacity=0.9, line=dict(width=1, color='DarkSlateGrey'), **marcador),
+            hovertemplate=TEMPLATE_HOVER,
+        ),
+        go.Scattergl(
+            x=x[maiores], y=y[maiores], text=nomes[maiores], mode='text', name='Rótulos',
+            textposition='top center', hoverinfo='skip',
+        ),
+        go.Scattergl(
+            x=x[destacados], y=y[destacados], text=nomes[destacados], mode='markers+text', name='Destaques',
+            textposition='top center', textfont=dict(size=14), hoverinfo='skip',
+            marker=dict(size=tamanho[destacados], color='rgba(0,0,0,0)', line=dict(width=3, color='black'), **marcador),
+        ),
+    ])
+    fig.update_layout(
+        title=f"<b>Cenário: {titulo}</b>",
+        template="plotly_white",
+        xaxis=dict(title="<b>Eixo X:</b> Participação Ferroviária (%)", dtick=10, range=[-5, 105]),
+        yaxis=dict(title="<b>Eixo Y:</b> Participação Rodoviária (%)", dtick=10, range=[-5, 105]),
+        height=650,
+        showlegend=False,
+        hovermode='closest'
+    )
+    return fig
+
+# ==============================================================================
+# 4. HTML INDEPENDENTE (EXPORTAÇÃO)
+# ==============================================================================
+MODELO_HTML = """<html>
+<head><meta charset="utf-8" /><title>{titulo}</title></head>
+<body>
+<div id="grafico" style="height:650px; width:100%;"></div>
+<script src="{plotlyjs}"></script>
+<script>Plotly.newPlot("grafico", {dados}, {layout}, {{"responsive": true}});</script>
+</body>
+</html>
+"""
+
+def html_figura(figura, plotlyjs):
+    """HTML independente de uma figura (dicionário de dados_figura); plotlyjs: caminho/URL do plotly.js."""
+    from plotly.io.json import to_json_plotly
+
+    return MODELO_HTML.format(
+        titulo=figura['layout']['title']['text'].replace('<b>', '').replace('</b>', ''),
+        plotlyjs=plotlyjs,
+        dados=to_json_plotly(figura['data']),
+        layout=to_json_plotly(figura['layout']),
+    )
@@ -0,0 +1,281 @@
+"""Instrumentação opcional da página: tempo por seção, cache e cProfile.
+
+Ativada por APP1_INSTRUMENTACAO=1 ou pelo parâmetro de URL ?debug=1.
+Cada rerun gera um registro com a duração de cada seção numerada do script
+e os contadores de cache dos loaders; os registros aparecem em um painel
+recolhível e, se APP1_INSTRUMENTACAO_ARQUIVO estiver definido, são gravados
+em JSON Lines (um registro por linha) ou, para arquivos .prom, no formato
+texto do Prometheus (totais acumulados no processo).
+"""
+import io
+import os
+import json
+import time
+import pstats
+import cProfile
+import threading
+import functools
+from contextlib import contextmanager
+
+import streamlit as st
+
+ATIVA_POR_AMBIENTE = os.environ.get('APP1_INSTRUMENTACAO', '0') == '1'
+ARQUIVO_EXPORTACAO = os.environ.get('APP1_INSTRUMENTACAO_ARQUIVO')
+HISTORICO_MAXIMO = 20
+
+_trava = threading.Lock()
+# Contadores por loader em cache: chamadas (acertos + falhas) e falhas
+ESTATISTICAS_CACHE = {}
+# Totais do processo para a exportação Prometheus
+_totais_secoes = {}
+
+# ==============================================================================
+# 1. CONTADORES DE CACHE DOS LOADERS
+# ==============================================================================
+def contar_cache(nome):
+    """Conta as chamadas de um loader decorado com st.cache_*.
+
+    Aplicar por fora do decorator de cache; dentro da função, registrar_falha
+    marca as execuções reais (cache miss).
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            with _trava:
+                ESTATISTICAS_CACHE.setdefault(nome, {'chamadas': 0, 'falhas': 0})['chamadas'] += 1
+            return funcao(*args, **kwargs)
+        envoltorio.clear = funcao.clear
+        return envoltorio
+    return decorador
+
+def registrar_falha(nome):
+    """Marca uma execução real (cache miss) do loader."""
+    with _trava:
+        ESTATISTICAS_CACHE.setdefault(nome, {'chamadas': 0, 'falhas': 0})['falhas'] += 1
+
+def _estatisticas_cache():
+    return {
+        nome: {**valores, 'acertos': valores['chamadas'] - valores['falhas']}
+        for nome, valores in ESTATISTICAS_CACHE.items()
+    }
+
+def copiar_estatisticas_cache():
+    """Cópia dos contadores com acertos calculados."""
+    with _trava:
+        return _estatisticas_cache()
+
+# ==============================================================================
+# 2. REGISTRO DE UM RERUN
+# ==============================================================================
+class RegistroRerun:
+    """Tempos por seção de um rerun (completo ou de um fragmento)."""
+
+    def __init__(self, tipo='completo', perfilar=False):
+        self.tipo = tipo
+        self.inicio = time.perf_counter()
+        self.horario = time.time()
+        self.secoes = {}
+        self.finalizado = False
+        self.perfil_texto = None
+        self.primeira_pintura = None
+        self._volta = None
+        self._perfil = cProfile.Profile() if perfilar else None
+        if self._perfil:
+            self._perfil.enable()
+
+    def _acumular(self, nome, duracao):
+        self.secoes[nome] = self.secoes.get(nome, 0.0) + duracao
+
+    def _fechar_volta(self):
+        if self._volta:
+            nome, inicio = self._volta
+            self._acumular(nome, time.perf_counter() - inicio)
+            self._volta = None
+
+    def marcar(self, nome):
+        """Encerra a seção sequencial corrente e inicia a próxima."""
+        self._fechar_volta()
+        self._volta = (nome, time.perf_counter())
+
+    def marcar_primeira_pintura(self):
+        """Registra o tempo até o primeiro conteúdo visível (título + metodologia)."""
+        if self.primeira_pintura is None:
+            self.primeira_pintura = time.perf_counter() - self.inicio
+
+    @contextmanager
+    def secao(self, nome):
+        """Mede um bloco (ex.: um fragmento) como seção própria."""
+        self._fechar_volta()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._acumular(nome, time.perf_counter() - inicio)
+
+    def finalizar(self):
+        """Fecha o registro, guarda o perfil e exporta."""
+        if self.finalizado:
+            return
+        self._fechar_volta()
+        self.total = time.perf_counter() - self.inicio
+        self.cache = copiar_estatisticas_cache()
+        self.finalizado = True
+        if self._perfil:
+            self._perfil.disable()
+            saida = io.StringIO()
+            pstats.Stats(self._perfil, stream=saida).sort_stats('cumulative').print_stats(30)
+            self.perfil_texto = saida.getvalue()
+        exportar(self)
+
+    def como_dict(self):
+        return {
+            'horario': self.horario,
+            'tipo': self.tipo,
+            'total_ms': round(self.total * 1000, 3),
+            'primeira_pintura_ms': round(self.primeira_pintura * 1000, 3) if self.primeira_pintura is not None else None,
+            'secoes_ms': {nome: round(d * 1000, 3) for nome, d in self.secoes.items()},
+            'cache': self.cache,
+        }
+
+class RegistroInativo:
+    """Registro nulo usado quando a instrumentação está desligada."""
+    finalizado = False
+
+    def marcar(self, nome):
+        pass
+
+    def marcar_primeira_pintura(self):
+        pass
+
+    @contextmanager
+    def secao(self, nome):
+        yield
+
+    def finalizar(self):
+        pass
+
+# ==============================================================================
+# 3. CICLO DE VIDA NA PÁGINA
+# ==============================================================================
+def instrumentacao_ativa():
+    """Opt-in por variável de ambiente ou ?debug=1 na URL."""
+    return ATIVA_POR_AMBIENTE or st.query_params.get('debug') == '1'
+
+def iniciar_rerun(tipo='completo'):
+    """Cria o registro do rerun corrente (nulo se a instrumentação estiver desligada)."""
+    if not instrumentacao_ativa():
+        return RegistroInativo()
+    perfilar = st.session_state.pop('_instrumentacao_perfilar', False)
+    registro = RegistroRerun(tipo, perfilar=perfilar)
+    st.session_state['_instrumentacao_registro'] = registro
+    return registro
+
+def medir_secao(nome):
+    """Decorator para seções em st.fragment: mede a execução da função.
+
+    Em um rerun só do fragmento o registro do rerun completo já foi fechado,
+    então um registro próprio ('fragmento: ...') é criado e exportado.
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            registro = st.session_state.get('_instrumentacao_registro')
+            if registro is None or not instrumentacao_ativa():
+                return funcao(*args, **kwargs)
+            if registro.finalizado:
+                registro = RegistroRerun(f"fragmento: {nome}")
+                with registro.secao(nome):
+                    resultado = funcao(*args, **kwargs)
+                registro.finalizar()
+                guardar_historico(registro)
+                return resultado
+            with registro.secao(nome):
+                return funcao(*args, **kwargs)
+        return envoltorio
+    return decorador
+
+def guardar_historico(registro):
+    historico = st.session_state.setdefault('_instrumentacao_historico', [])
+    historico.append(registro.como_dict())
+    del historico[:-HISTORICO_MAXIMO]
+
+def painel_debug(registro):
+    """Finaliza o registro e mostra o painel recolhível de instrumentação."""
+    if isinstance(registro, RegistroInativo):
+        return
+    registro.finalizar()
+    guardar_historico(registro)
+
+    with st.expander("🛠️ Instrumentação (debug)"):
+        st.markdown(f"**Último rerun completo:** {registro.total * 1000:.1f} ms")
+        if registro.primeira_pintura is not None:
+            st.markdown(f"**Primeiro conteúdo visível:** {registro.primeira_pintura * 1000:.1f} ms")
+        st.dataframe(
+            {'Seção': list(registro.secoes), 'Tempo (ms)': [round(d * 1000, 2) for d in registro.secoes.values()]},
+            width="stretch",
+            hide_index=True
+        )
+        st.markdown("**Caches dos loaders (acumulado no processo):**")
+        st.dataframe(
+            [{'Loader': nome, **valores} for nome, valores in registro.cache.items()],
+            width="stretch",
+            hide_index=True
+        )
+        st.markdown("**Histórico (inclui reruns de fragmentos):**")
+        st.dataframe(
+            [{'Tipo': r['tipo'], 'Total (ms)': r['total_ms']} for r in st.session_state['_instrumentacao_historico']],
+            width="stretch",
+            hide_index=True
+        )
+        if st.button("🔬 Perfilar próximo rerun (cProfile)", key="_instrumentacao_botao_perfil"):
+            st.session_state['_instrumentacao_perfilar'] = True
+            st.rerun()
+        if registro.perfil_texto:
+            st.code(registro.perfil_texto, language=None)
+        if ARQUIVO_EXPORTACAO:
+            st.caption(f"Exportando para: {ARQUIVO_EXPORTACAO}")
+
+# ==============================================================================
+# 4. EXPORTAÇÃO (JSON LINES OU PROMETHEUS)
+# ==============================================================================
+def exportar(registro):
+    """Grava o registro no arquivo configurado (se houver)."""
+    with _trava:
+        for nome, duracao in registro.secoes.items():
+            total = _totais_secoes.setdefault(nome, [0, 0.0])
+            total[0] += 1
+            total[1] += duracao
+        if not ARQUIVO_EXPORTACAO:
+            return
+        if ARQUIVO_EXPORTACAO.endswith('.prom'):
+            texto = formatar_prometheus(_totais_secoes, _estatisticas_cache())
+            temporario = ARQUIVO_EXPORTACAO + '.tmp'
+            with open(temporario, 'w', encoding='utf-8') as arquivo:
+                arquivo.write(texto)
+            os.replace(temporario, ARQUIVO_EXPORTACAO)
+        else:
+            with open(ARQUIVO_EXPORTACAO, 'a', encoding='utf-8') as arquivo:
+                arquivo.write(json.dumps(registro.como_dict(), ensure_ascii=False) + '\n')
+
+def _rotulo(valor):
+    return valor.replace('\\', '\\\\').replace('"', '\\"')
+
+def formatar_prometheus(totais_secoes, cache):
+    """Métricas acumuladas no formato texto do Prometheus."""
+    linhas = [
+        '# HELP app1_secao_segundos_total Tempo acumulado por seção do script.',
+        '# TYPE app1_secao_segundos_total counter',
+    ]
+    linhas += [f'app1_secao_segundos_total{{secao="{_rotulo(n)}"}} {t[1]:.6f}' for n, t in totais_secoes.items()]
+    linhas += [
+        '# HELP app1_secao_execucoes_total Execuções por seção do script.',
+        '# TYPE app1_secao_execucoes_total counter',
+    ]
+    linhas += [f'app1_secao_execucoes_total{{secao="{_rotulo(n)}"}} {t[0]}' for n, t in totais_secoes.items()]
+    for metrica, campo in [('chamadas', 'chamadas'), ('falhas', 'falhas'), ('acertos', 'acertos')]:
+        linhas += [
+            f'# HELP app1_cache_{metrica}_total Loaders em cache: {campo}.',
+            f'# TYPE app1_cache_{metrica}_total counter',
+        ]
+        linhas += [f'app1_cache_{metrica}_total{{loader="{_rotulo(n)}"}} {v[campo]}' for n, v in cache.items()]
+    return '\n'.join(linhas) + '\n'
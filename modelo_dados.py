@@ -0,0 +1,869 @@
+"""Modelo de dados do App1: fontes, processamento, cubos e caches.
+
+Separado da página (App1_Final.py) para ser reutilizado por ferramentas de
+linha de comando sem executar a interface Streamlit.
+"""
+import streamlit as st
+import pandas as pd
+import numpy as np
+import io
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+import subprocess
+import importlib.util
+import unicodedata
+from types import MappingProxyType
+from typing import NamedTuple, Optional
+
+from instrumentacao import contar_cache, registrar_falha
+
+# ==============================================================================
+# 1. DADOS EMBUTIDOS (MÓDULO dados_embutidos, IMPORTADO SOB DEMANDA)
+# ==============================================================================
+# Os textos CSV e o cenário inicial ficam em dados_embutidos.py e só são
+# importados quando processados (não no import do modelo nem no caminho do
+# snapshot, que usa o hash do arquivo).
+CAMINHO_DADOS_EMBUTIDOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados_embutidos.py')
+
+def texto_embutido(nome):
+    """Texto CSV embutido da fonte ('percentuais' ou 'tkm')."""
+    import dados_embutidos
+    return {'percentuais': dados_embutidos.DATA_REAL_CSV, 'tkm': dados_embutidos.DATA_TKM_ABSOLUTO}[nome]
+
+def cenario_inicial():
+    """Linhas (País, Ferroviário, Rodoviário, Aquaviário) do cenário inicial."""
+    import dados_embutidos
+    return dados_embutidos.DADOS_CENARIO_INICIAL
+
+# ==============================================================================
+# 2. CUBO PAÍS x ANO x MODAL
+# ==============================================================================
+COLUNAS_MODAIS = ['Ferroviário (%)', 'Rodoviário (%)', 'Aquaviário (%)']
+MODAIS_TKM = ['Ferroviário', 'Rodoviário', 'Aquaviário']
+# Participações (0-100, duas casas) cabem em float32 sem perda na exibição
+TIPO_PARTICIPACAO = np.float32
+# Rótulo do cenário de benchmark, guardado fora do eixo de anos
+CENARIO_INICIAL = 'Inicial'
+
+def normalizar_para_ordenacao(texto):
+    """Normaliza texto para ordenação alfabética correta (remove acentos)."""
+    if isinstance(texto, str):
+        return unicodedata.normalize('NFKD', texto).encode('ASCII', 'ignore').decode('utf-8').lower()
+    return ""
+
+def normalizar_chaves_pais(paises):
+    """Chaves de país canônicas, em lote: NFC, sem espaços nas pontas nem repetidos."""
+    return (
+        pd.Series(paises, dtype=object)
+        .str.normalize('NFC').str.strip().str.replace(r'\s+', ' ', regex=True)
+    )
+
+def normalizar_registrando(paises):
+    """normalizar_chaves_pais + os pares (original, normalizada) alterados, sem repetição."""
+    originais = pd.Series(paises, dtype=object)
+    normalizadas = normalizar_chaves_pais(originais)
+    alteradas = ((originais != normalizadas) & normalizadas.notna()).to_numpy()
+    return normalizadas, tuple(dict.fromkeys(zip(originais[alteradas], normalizadas[alteradas])))
+
+class OcorrenciasFonte(NamedTuple):
+    """Ocorrências registradas na ingestão de uma fonte (base da validação).
+
+    Calculadas no mesmo passo que monta o cubo e gravadas no manifesto do
+    snapshot, de modo que o relatório não relê as fontes. Por rótulo, não
+    por posição, para sobreviverem à mescla de incrementos:
+    * chaves: (original, normalizada) dos nomes de país alterados;
+    * somas:  (País, Ano, soma, situação) das linhas fora de 100% ou incompletas;
+    * piso:   (País, Ano, Modal, informado) das células abaixo do piso.
+    """
+    chaves: tuple = ()
+    somas: tuple = ()
+    piso: tuple = ()
+
+class CuboModal(NamedTuple):
+    """Cubo denso País x Ano x Modal com mapas de índice inteiros.
+
+    O eixo de países segue a ordem alfabética sem acentos, logo a posição
+    em idx_pais é também o rank de colação do país. Os anos são inteiros;
+    o cenário inicial (só no cubo percentual) fica à parte, em inicial
+    (País x Modal), e é pedido pelo rótulo CENARIO_INICIAL. Os cubos das
+    fontes trazem em ocorrencias o que a ingestão registrou.
+    """
+    valores: np.ndarray
+    paises: list
+    anos: list
+    modais: list
+    idx_pais: dict
+    idx_ano: dict
+    tipo_pais: pd.CategoricalDtype
+    inicial: Optional[np.ndarray] = None
+    ocorrencias: Optional[OcorrenciasFonte] = None
+
+def montar_cubo(paises, anos, modais, valores, inicial=None):
+    """Monta o cubo e os mapas de índice (rótulo -> posição no eixo)."""
+    anos = [int(a) for a in anos]
+    return CuboModal(
+        valores=valores,
+        paises=list(paises),
+        anos=anos,
+        modais=list(modais),
+        idx_pais={p: i for i, p in enumerate(paises)},
+        idx_ano={a: i for i, a in enumerate(anos)},
+        tipo_pais=pd.CategoricalDtype(paises, ordered=True),
+        inicial=inicial,
+    )
+
+def posicao_ano(cubo, ano):
+    """Posição do ano (inteiro ou texto) no eixo do cubo; None se ausente."""
+    try:
+        return cubo.idx_ano.get(int(ano))
+    except (TypeError, ValueError):
+        return None
+
+def rotulos_cenarios(cubo):
+    """Rótulos da linha do tempo: CENARIO_INICIAL (se houver) + anos em texto."""
+    return ([CENARIO_INICIAL] if cubo.inicial is not None else []) + [str(a) for a in cubo.anos]
+
+def bloco_cenario(cubo, ano):
+    """Matriz País x Modal de um ano ou do cenário inicial (KeyError se ausente)."""
+    if ano == CENARIO_INICIAL and cubo.inicial is not None:
+        return cubo.inicial
+    posicao = posicao_ano(cubo, ano)
+    if posicao is None:
+        raise KeyError(ano)
+    return cubo.valores[:, posicao, :]
+
+def mesclar_cubos(cubo, parcial):
+    """Novo cubo com os países/anos de parcial incorporados (anos novos,
+    países novos ou revisões); valores não nulos de parcial prevalecem.
+
+    Só o bloco de parcial é processado; o resto é copiado por posição. O
+    cubo original não é alterado (pode ser o compartilhado, congelado).
+    """
+    novos_paises = [p for p in parcial.paises if p not in cubo.idx_pais]
+    paises = sorted(cubo.paises + novos_paises, key=normalizar_para_ordenacao) if novos_paises else list(cubo.paises)
+    anos = sorted(set(cubo.anos) | set(parcial.anos))
+    idx_pais = {p: i for i, p in enumerate(paises)}
+    idx_ano = {a: i for i, a in enumerate(anos)}
+    pos_pais = np.array([idx_pais[p] for p in cubo.paises], dtype=np.intp)
+    pos_ano = np.array([idx_ano[a] for a in cubo.anos], dtype=np.intp)
+
+    valores = np.full((len(paises), len(anos), len(cubo.modais)), np.nan, dtype=cubo.valores.dtype)
+    valores[np.ix_(pos_pais, pos_ano)] = cubo.valores
+    bloco = np.ix_(
+        np.array([idx_pais[p] for p in parcial.paises], dtype=np.intp),
+        np.array([idx_ano[a] for a in parcial.anos], dtype=np.intp),
+    )
+    valores[bloco] = np.where(np.isnan(parcial.valores), valores[bloco], parcial.valores)
+
+    inicial = None
+    if cubo.inicial is not None:
+        inicial = np.full((len(paises), len(cubo.modais)), np.nan, dtype=cubo.inicial.dtype)
+        inicial[pos_pais] = cubo.inicial
+    return montar_cubo(paises, anos, cubo.modais, valores, inicial)._replace(
+        ocorrencias=mesclar_ocorrencias(cubo.ocorrencias, parcial)
+    )
+
+def mesclar_ocorrencias(anteriores, parcial):
+    """Ocorrências após a mescla: as de parcial substituem as anteriores nas
+    linhas (País x Ano) e células que parcial informa.
+
+    Cada arquivo é verificado como entregue: a soma de uma linha revista
+    vale para os modais que o incremento traz.
+    """
+    if anteriores is None or parcial.ocorrencias is None:
+        return parcial.ocorrencias if anteriores is None else anteriores
+    presentes = ~np.isnan(parcial.valores)
+
+    def informada(pais, ano, modal=None):
+        i, j = parcial.idx_pais.get(pais), parcial.idx_ano.get(ano)
+        if i is None or j is None:
+            return False
+        return bool(presentes[i, j].any() if modal is None else presentes[i, j, list(parcial.modais).index(modal)])
+
+    return OcorrenciasFonte(
+        chaves=tuple(dict.fromkeys(anteriores.chaves + parcial.ocorrencias.chaves)),
+        somas=tuple(o for o in anteriores.somas if not informada(*o[:2])) + parcial.ocorrencias.somas,
+        piso=tuple(o for o in anteriores.piso if not informada(*o[:3])) + parcial.ocorrencias.piso,
+    )
+
+def congelar_array(valores):
+    """Marca o array como somente leitura (escritas levantam ValueError)."""
+    valores.setflags(write=False)
+    return valores
+
+def congelar_cubo(cubo):
+    """Cubo imutável para compartilhar entre sessões.
+
+    Valores somente leitura, eixos em tuplas e mapas de índice sem escrita:
+    qualquer tentativa de alterar o cubo compartilhado levanta erro.
+    """
+    return cubo._replace(
+        valores=congelar_array(cubo.valores),
+        paises=tuple(cubo.paises),
+        anos=tuple(cubo.anos),
+        modais=tuple(cubo.modais),
+        idx_pais=MappingProxyType(dict(cubo.idx_pais)),
+        idx_ano=MappingProxyType(dict(cubo.idx_ano)),
+        inicial=congelar_array(cubo.inicial) if cubo.inicial is not None else None,
+    )
+
+def ordenar_paises(paises, cubo):
+    """Ordena países pelo rank de colação do cubo (sem normalização Unicode)."""
+    return sorted(paises, key=cubo.idx_pais.__getitem__)
+
+def fatia_cubo(cubo, paises, ano):
+    """Recorte País x Modal de um ano; custo proporcional aos países pedidos."""
+    linhas = [cubo.idx_pais[p] for p in paises if p in cubo.idx_pais]
+    bloco = bloco_cenario(cubo, ano)[linhas]
+    indice = pd.CategoricalIndex(pd.Categorical.from_codes(linhas, dtype=cubo.tipo_pais), name='Pais')
+    df_fatia = pd.DataFrame(bloco, index=indice, columns=cubo.modais)
+    # Países sem dado no ano (ex.: fora do Cenário Inicial) não aparecem
+    return df_fatia.dropna(how='all')
+
+def fatia_cubo_anos(cubo, paises):
+    """Recorte longo País x Ano com o cenário inicial e todos os anos (quadros da animação).
+
+    Mantém linhas vazias para que todo país exista em todos os quadros; a
+    coluna Ano traz os rótulos da linha do tempo (texto).
+    """
+    linhas = [cubo.idx_pais[p] for p in paises if p in cubo.idx_pais]
+    bloco = cubo.valores[linhas]
+    if cubo.inicial is not None:
+        bloco = np.concatenate([cubo.inicial[linhas][:, None, :], bloco], axis=1)
+    rotulos = rotulos_cenarios(cubo)
+    bloco = bloco.transpose(1, 0, 2).reshape(-1, len(cubo.modais))
+    df_anos = pd.DataFrame(bloco, columns=cubo.modais)
+    df_anos.insert(0, 'Pais', pd.Categorical.from_codes(np.tile(linhas, len(rotulos)), dtype=cubo.tipo_pais))
+    df_anos.insert(1, 'Ano', np.repeat(np.asarray(rotulos, dtype=object), len(linhas)))
+    return df_anos
+
+# Participações positivas abaixo do piso são exibidas como o piso (a
+# validação das fontes lista cada célula alterada)
+PISO_PERCENTUAL = 0.1
+# Soma das três participações informadas: |soma - 100| acima disso é sinalizado
+TOLERANCIA_SOMA_PP = 1.0
+
+def para_percentual(valores):
+    """Razões -> percentuais (em lote); valores já em % ficam como estão."""
+    # Multiplica por 100 se estiver em decimal (ratio <= 1.5); NaN é preservado
+    return np.where(valores <= 1.5, valores * 100, valores)
+
+def aplicar_piso(valores):
+    """Piso visual de PISO_PERCENTUAL e arredondamento a 2 casas (em lote)."""
+    valores = np.where((valores > 0) & (valores < PISO_PERCENTUAL), PISO_PERCENTUAL, valores)
+    return np.round(valores, 2)
+
+# ==============================================================================
+# 3. FONTES E PROCESSAMENTO
+# ==============================================================================
+# --- Fontes em arquivo (opcional) ---
+# Coloque percentuais.csv/.parquet e tkm.csv/.parquet (mesmo layout das
+# strings DATA_REAL_CSV / DATA_TKM_ABSOLUTO de dados_embutidos.py) no
+# diretório de dados para substituir os dados embutidos, sem reiniciar o
+# servidor.
+#
+# --- Incrementos (opcional) ---
+# Arquivos incrementos/percentuais_*.csv e incrementos/tkm_*.csv (mesmo
+# layout, só com as colunas de anos novos e/ou as linhas de países novos
+# ou revisados) são aplicados sobre a base em ordem de nome. Um incremento
+# novo é incorporado ao último cubo montado, sem reprocessar a base.
+DIRETORIO_DADOS = os.environ.get(
+    'APP1_DADOS_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados')
+)
+
+def extensoes_fonte():
+    """Extensões aceitas, em ordem de prioridade (Parquet só se houver motor)."""
+    extensoes = ['.csv']
+    if importlib.util.find_spec('pyarrow') or importlib.util.find_spec('fastparquet'):
+        extensoes.insert(0, '.parquet')
+    return extensoes
+
+def localizar_fonte(nome):
+    """Caminho do arquivo da fonte (Parquet tem prioridade, se houver motor) ou None."""
+    for extensao in extensoes_fonte():
+        caminho = os.path.join(DIRETORIO_DADOS, nome + extensao)
+        if os.path.isfile(caminho):
+            return caminho
+    return None
+
+def localizar_incrementos(nome):
+    """Arquivos de incremento da fonte, em ordem de nome (um por nome-base)."""
+    diretorio = os.path.join(DIRETORIO_DADOS, 'incrementos')
+    if not os.path.isdir(diretorio):
+        return []
+    encontrados = {}
+    for extensao in reversed(extensoes_fonte()):
+        for arquivo in os.listdir(diretorio):
+            if arquivo.startswith(nome + '_') and arquivo.endswith(extensao):
+                encontrados[arquivo[:-len(extensao)]] = os.path.join(diretorio, arquivo)
+    return [encontrados[base] for base in sorted(encontrados)]
+
+class AssinaturaFonte(NamedTuple):
+    """Versão da fonte: arquivo base (None = embutido) e incrementos.
+
+    Cada arquivo entra como (caminho, mtime_ns, tamanho).
+    """
+    base: Optional[tuple]
+    incrementos: tuple = ()
+
+def assinatura_arquivo(caminho):
+    info = os.stat(caminho)
+    return (caminho, info.st_mtime_ns, info.st_size)
+
+def assinatura_fonte(nome):
+    """AssinaturaFonte dos arquivos da fonte; None = dados embutidos sem incrementos.
+
+    Usada como argumento dos loaders em cache: os arquivos só são relidos
+    quando a assinatura muda.
+    """
+    caminho = localizar_fonte(nome)
+    incrementos = tuple(assinatura_arquivo(c) for c in localizar_incrementos(nome))
+    if caminho is None and not incrementos:
+        return None
+    return AssinaturaFonte(assinatura_arquivo(caminho) if caminho else None, incrementos)
+
+def dividir_assinatura(assinatura):
+    """AssinaturaFonte completa (None vira base embutida sem incrementos)."""
+    return assinatura if assinatura is not None else AssinaturaFonte(None)
+
+def ler_fonte(nome, caminho=None):
+    """Lê a tabela larga da fonte (arquivo ou, com caminho None, texto embutido)."""
+    if caminho is None:
+        # engine='python' para maior robustez
+        df_fonte = pd.read_csv(io.StringIO(texto_embutido(nome)), sep=",", engine="python")
+    elif caminho.endswith('.parquet'):
+        df_fonte = pd.read_parquet(caminho)
+    else:
+        df_fonte = pd.read_csv(caminho, sep=",", engine="python")
+    df_fonte.columns = df_fonte.columns.astype(str)
+    return df_fonte
+
+# Rótulos da coluna 'Combined measure' de percentuais.csv (por modal do tkm)
+MEDIDAS_PERCENTUAIS = {
+    'Ferroviário': 'Ferroviario - Freight transport',
+    'Rodoviário': 'Rodoviario -  Freight transport',
+    'Aquaviário': 'Aquaviario -  Freight transport',
+}
+
+MAPA_MODAIS = {
+    'Ferroviario - Freight transport': 'Ferroviário (%)',
+    'Rodoviario -  Freight transport': 'Rodoviário (%)',
+    'Rodoviario - Freight transport': 'Rodoviário (%)',
+    'Aquaviario -  Freight transport': 'Aquaviário (%)',
+    'Aquaviario - Freight transport': 'Aquaviário (%)'
+}
+
+def cubo_percentuais_informados(df_real_raw, tipo=np.float64):
+    """Tabela larga de percentuais (Pais, Combined measure, anos) -> cubo
+    parcial com os valores informados, em % (sem piso nem arredondamento).
+    As chaves de país alteradas vão para ocorrencias."""
+    anos_reais = [c for c in df_real_raw.columns if c not in ('Pais', 'Combined measure')]
+    
+    df_real_raw['Pais'], chaves = normalizar_registrando(df_real_raw['Pais'])
+    df_real_raw['Combined measure'] = df_real_raw['Combined measure'].map(MAPA_MODAIS)
+    df_real_raw = df_real_raw.dropna(subset=['Combined measure'])
+    
+    # Uma linha por (País, Modal); primeiro valor não nulo por ano (= aggfunc='first')
+    df_real = df_real_raw.groupby(['Pais', 'Combined measure'], sort=False)[anos_reais].first()
+    
+    # Cubo denso preenchido diretamente (sem melt/pivot)
+    # Colação sem acentos calculada uma única vez por país, no carregamento
+    paises = sorted(set(df_real.index.get_level_values('Pais')), key=normalizar_para_ordenacao)
+    anos = sorted(int(a) for a in anos_reais)
+    cubo = montar_cubo(
+        paises, anos, COLUNAS_MODAIS,
+        np.full((len(paises), len(anos), len(COLUNAS_MODAIS)), np.nan, dtype=tipo),
+    )._replace(ocorrencias=OcorrenciasFonte(chaves))
+    
+    pos_pais = df_real.index.get_level_values('Pais').map(cubo.idx_pais).to_numpy()
+    pos_modal = df_real.index.get_level_values('Combined measure').map(COLUNAS_MODAIS.index).to_numpy()
+    pos_anos = np.array([cubo.idx_ano[int(a)] for a in anos_reais], dtype=np.intp)
+    cubo.valores[pos_pais[:, None], pos_anos[None, :], pos_modal[:, None]] = para_percentual(df_real.to_numpy(dtype=float))
+    return cubo
+
+def verificar_informados(informados):
+    """Ocorrências de um cubo parcial de percentuais informados: linhas
+    País x Ano fora de 100 ± TOLERANCIA_SOMA_PP ou com modal ausente e
+    células positivas abaixo do piso (em lote)."""
+    valores = informados.valores
+    presentes = ~np.isnan(valores)
+    soma = np.nansum(valores, axis=2)
+    completos = presentes.all(axis=2)
+    incompletos = presentes.any(axis=2) & ~completos
+    linhas = np.nonzero((completos & (np.abs(soma - 100) > TOLERANCIA_SOMA_PP)) | incompletos)
+    celulas = np.nonzero((valores > 0) & (valores < PISO_PERCENTUAL))
+    return informados.ocorrencias._replace(
+        somas=tuple(
+            (informados.paises[i], informados.anos[j], round(float(soma[i, j]), 4),
+             'Modal ausente' if incompletos[i, j] else 'Soma fora de 100%')
+            for i, j in zip(*linhas)
+        ),
+        piso=tuple(
+            (informados.paises[i], informados.anos[j], informados.modais[k], round(float(valores[i, j, k]), 4))
+            for i, j, k in zip(*celulas)
+        ),
+    )
+
+def tabela_percentuais(df_real_raw):
+    """Tabela larga de percentuais -> cubo parcial (com piso visual e arredondamento),
+    verificado sobre os valores informados."""
+    informados = cubo_percentuais_informados(df_real_raw)
+    return informados._replace(
+        valores=aplicar_piso(informados.valores).astype(TIPO_PARTICIPACAO),
+        ocorrencias=verificar_informados(informados),
+    )
+
+def processar_percentuais(caminho=None):
+    """Carrega, limpa e unifica os dados percentuais e iniciais no cubo
+    País x Ano x Modal (cenário inicial à parte), a partir do texto da fonte.
+    """
+    # 1. Percentuais (arquivo do diretório de dados ou DATA_REAL_CSV)
+    parcial = tabela_percentuais(ler_fonte('percentuais', caminho))
+    
+    # 2. Dados iniciais (Benchmark) - DADOS_CENARIO_INICIAL de dados_embutidos
+    df_ini = pd.DataFrame(cenario_inicial(), columns=['Pais'] + COLUNAS_MODAIS)
+    paises = sorted(set(df_ini['Pais']) | set(parcial.paises), key=normalizar_para_ordenacao)
+    cubo = montar_cubo(
+        paises, [], COLUNAS_MODAIS,
+        np.full((len(paises), 0, len(COLUNAS_MODAIS)), np.nan, dtype=TIPO_PARTICIPACAO),
+        inicial=np.full((len(paises), len(COLUNAS_MODAIS)), np.nan, dtype=TIPO_PARTICIPACAO),
+    )
+    cubo.inicial[df_ini['Pais'].map(cubo.idx_pais).to_numpy(), :] = df_ini[COLUNAS_MODAIS].to_numpy(dtype=float)
+    
+    # 3. Série histórica incorporada ao eixo de países já completo
+    return mesclar_cubos(cubo, parcial)
+
+def tabela_tkm(df_tkm):
+    """Tabela larga de tkm (Pais, Modal, anos) -> cubo País x Ano x Modal."""
+    df_tkm['Pais'], chaves = normalizar_registrando(df_tkm['Pais'])
+
+    # Cubo País x Ano x Modal (ordem fixa dos modais; modal ausente fica NaN)
+    df_wide = df_tkm.pivot(index='Pais', columns='Modal')
+    df_wide = df_wide.iloc[np.argsort([normalizar_para_ordenacao(p) for p in df_wide.index], kind='stable')]
+    paises = df_wide.index.tolist()
+    anos = df_wide.columns.get_level_values(0).unique().tolist()
+    df_wide = df_wide.reindex(columns=pd.MultiIndex.from_product([anos, MODAIS_TKM]))
+    valores = df_wide.to_numpy(dtype=float).reshape(len(paises), len(anos), len(MODAIS_TKM))
+    return montar_cubo(paises, anos, MODAIS_TKM, valores)._replace(ocorrencias=OcorrenciasFonte(chaves))
+
+def processar_tkm(caminho=None):
+    """Carrega os dados absolutos (TKM) já pivotados no cubo País x Ano x Modal."""
+    return tabela_tkm(ler_fonte('tkm', caminho))
+
+# Processamento completo da base e leitura de um incremento, por fonte
+PROCESSADORES = {
+    'percentuais': (processar_percentuais, tabela_percentuais),
+    'tkm': (processar_tkm, tabela_tkm),
+}
+
+def incorporar_incrementos(nome, cubo, incrementos):
+    """Aplica ao cubo, em ordem, os incrementos (assinaturas de arquivo) da fonte."""
+    tabela = PROCESSADORES[nome][1]
+    for caminho, *_ in incrementos:
+        cubo = mesclar_cubos(cubo, tabela(ler_fonte(nome, caminho)))
+    return cubo
+
+def processar_fonte(nome, assinatura):
+    """Cubo da fonte pelo caminho CSV/Parquet: base completa + incrementos."""
+    assinatura = dividir_assinatura(assinatura)
+    cubo = PROCESSADORES[nome][0](assinatura.base[0] if assinatura.base else None)
+    return incorporar_incrementos(nome, cubo, assinatura.incrementos)
+
+# ==============================================================================
+# 4. SNAPSHOT BINÁRIO (PARTIDA A FRIO)
+# ==============================================================================
+# Cada cubo processado é gravado como .npy (carregado via memory-map) e um
+# manifesto JSON registra o formato, a versão da fonte, os eixos e as
+# ocorrências da ingestão. Se o snapshot faltar ou não corresponder à fonte
+# atual, volta-se ao caminho CSV.
+VERSAO_SNAPSHOT = 3
+DIRETORIO_SNAPSHOT = os.environ.get(
+    'APP1_SNAPSHOT_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshot')
+)
+USAR_SNAPSHOT = os.environ.get('APP1_USAR_SNAPSHOT', '1') != '0'
+
+def versao_fonte(nome, assinatura):
+    """Identificador do conteúdo da fonte (hash da base e dos incrementos).
+
+    Baseado no conteúdo, não no mtime, para valer entre réplicas/cópias.
+    Os dados embutidos entram pelo hash de dados_embutidos.py, sem importá-lo.
+    """
+    assinatura = dividir_assinatura(assinatura)
+    with open(CAMINHO_DADOS_EMBUTIDOS, 'rb') as arquivo:
+        embutidos = arquivo.read()
+    if assinatura.base is None:
+        origem, conteudo = 'embutido', embutidos
+    else:
+        with open(assinatura.base[0], 'rb') as arquivo:
+            origem, conteudo = os.path.basename(assinatura.base[0]), arquivo.read()
+        if nome == 'percentuais':
+            # O cenário inicial também faz parte do cubo percentual
+            conteudo += embutidos
+    for caminho, *_ in assinatura.incrementos:
+        with open(caminho, 'rb') as arquivo:
+            conteudo += arquivo.read()
+    if assinatura.incrementos:
+        origem += f"+{len(assinatura.incrementos)}"
+    return f"{origem}:{hashlib.sha1(conteudo).hexdigest()}"
+
+def ler_manifesto(diretorio):
+    """Manifesto do snapshot ou None se ausente/ilegível."""
+    try:
+        with open(os.path.join(diretorio, 'manifesto.json'), encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+def carregar_snapshot(nome, versao, diretorio=None):
+    """Cubo do snapshot (memory-map, somente leitura) ou None se ausente/desatualizado."""
+    if not USAR_SNAPSHOT:
+        return None
+    diretorio = diretorio or DIRETORIO_SNAPSHOT
+    manifesto = ler_manifesto(diretorio)
+    if not manifesto or manifesto.get('versao_formato') != VERSAO_SNAPSHOT:
+        return None
+    item = manifesto['cubos'].get(nome)
+    if not item or item['fonte'] != versao:
+        return None
+    try:
+        valores = np.load(os.path.join(diretorio, item['arquivo']), mmap_mode='r')
+        inicial = None
+        if item.get('arquivo_inicial'):
+            inicial = np.load(os.path.join(diretorio, item['arquivo_inicial']), mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    ocorrencias = OcorrenciasFonte(*(tuple(map(tuple, item['ocorrencias'][campo])) for campo in OcorrenciasFonte._fields))
+    return montar_cubo(item['paises'], item['anos'], item['modais'], valores, inicial)._replace(ocorrencias=ocorrencias)
+
+def construir_snapshot(diretorio=None):
+    """Processa as fontes atuais (base + incrementos) pelo caminho CSV e grava o snapshot."""
+    diretorio = diretorio or DIRETORIO_SNAPSHOT
+    os.makedirs(diretorio, exist_ok=True)
+    manifesto = {'versao_formato': VERSAO_SNAPSHOT, 'cubos': {}}
+    for nome in PROCESSADORES:
+        assinatura = assinatura_fonte(nome)
+        cubo = processar_fonte(nome, assinatura)
+        arquivos = {'arquivo': (f"{nome}.npy", cubo.valores)}
+        if cubo.inicial is not None:
+            arquivos['arquivo_inicial'] = (f"{nome}_inicial.npy", cubo.inicial)
+        for arquivo, valores in arquivos.values():
+            # Grava em arquivo temporário e troca atomicamente (leitores concorrentes)
+            temporario = os.path.join(diretorio, arquivo + '.tmp')
+            with open(temporario, 'wb') as saida:
+                np.save(saida, np.ascontiguousarray(valores))
+            os.replace(temporario, os.path.join(diretorio, arquivo))
+        manifesto['cubos'][nome] = {
+            'fonte': versao_fonte(nome, assinatura),
+            **{chave: arquivo for chave, (arquivo, _) in arquivos.items()},
+            'paises': cubo.paises,
+            'anos': cubo.anos,
+            'modais': cubo.modais,
+            'ocorrencias': cubo.ocorrencias._asdict(),
+        }
+    temporario = os.path.join(diretorio, 'manifesto.json.tmp')
+    with open(temporario, 'w', encoding='utf-8') as saida:
+        json.dump(manifesto, saida, ensure_ascii=False, indent=1)
+    os.replace(temporario, os.path.join(diretorio, 'manifesto.json'))
+    return manifesto
+
+# ==============================================================================
+# 5. CARREGAMENTO EM CACHE (COMPARTILHADO PELAS SESSÕES)
+# ==============================================================================
+# Modo compartilhado (padrão): o cubo percentual é mantido uma vez por
+# processo (st.cache_resource), congelado, e servido sem cópia a todas as
+# sessões. Com APP1_DADOS_COMPARTILHADOS=0 volta-se ao st.cache_data, que
+# entrega uma cópia (unpickle) a cada chamada.
+DADOS_COMPARTILHADOS = os.environ.get('APP1_DADOS_COMPARTILHADOS', '1') != '0'
+
+# Último cubo montado por fonte, com a assinatura correspondente. Se a nova
+# assinatura só acrescenta incrementos, apenas eles são lidos e incorporados.
+_cubos_recentes = {}
+# Últimas variações montadas (cubo, tkm alinhado, resultado), base do
+# cálculo incremental em carregar_variacoes
+_variacoes_recentes = {}
+_trava_recentes = threading.Lock()
+
+def limpar_recentes():
+    """Esquece os últimos cubos/variações (próxima carga volta a partir da base)."""
+    with _trava_recentes:
+        _cubos_recentes.clear()
+        _variacoes_recentes.clear()
+
+def montar_cubo_fonte(nome, assinatura):
+    """Cubo da fonte: snapshot, último cubo + incrementos novos ou base processada."""
+    assinatura = dividir_assinatura(assinatura)
+    with _trava_recentes:
+        anterior = _cubos_recentes.get(nome)
+    if (
+        anterior is not None
+        and anterior[0].base == assinatura.base
+        and assinatura.incrementos[:len(anterior[0].incrementos)] == anterior[0].incrementos
+    ):
+        cubo = incorporar_incrementos(nome, anterior[1], assinatura.incrementos[len(anterior[0].incrementos):])
+    else:
+        cubo = carregar_snapshot(nome, versao_fonte(nome, assinatura))
+        if cubo is None and assinatura.incrementos:
+            # Snapshot só da base: basta aplicar os incrementos
+            cubo = carregar_snapshot(nome, versao_fonte(nome, AssinaturaFonte(assinatura.base)))
+            if cubo is not None:
+                cubo = incorporar_incrementos(nome, cubo, assinatura.incrementos)
+        if cubo is None:
+            cubo = processar_fonte(nome, assinatura)
+    with _trava_recentes:
+        _cubos_recentes[nome] = (assinatura, cubo)
+    return cubo
+
+@contar_cache('dados_completos')
+@st.cache_data(max_entries=4)
+def carregar_dados_completos(assinatura=None):
+    """Carrega, limpa e unifica os dados percentuais e iniciais.
+
+    Usa o snapshot binário quando ele corresponde à fonte atual; caso
+    contrário processa o texto (ou só os incrementos novos). Retorna só
+    o cubo (com os rótulos de países, anos e modais): a página e as
+    exportações recortam dele, sem DataFrame longo.
+    """
+    registrar_falha('dados_completos')
+    return montar_cubo_fonte('percentuais', assinatura)
+
+@contar_cache('cubo_compartilhado')
+@st.cache_resource(max_entries=2)
+def carregar_cubo_compartilhado(assinatura=None):
+    """Cubo percentual único por processo, somente leitura (ver congelar_cubo)."""
+    registrar_falha('cubo_compartilhado')
+    return congelar_cubo(montar_cubo_fonte('percentuais', assinatura))
+
+def carregar_cubo_percentuais(assinatura=None):
+    """Cubo percentual conforme o modo: compartilhado (sem cópia) ou cópia por chamada."""
+    if DADOS_COMPARTILHADOS:
+        return carregar_cubo_compartilhado(assinatura)
+    return carregar_dados_completos(assinatura)
+
+@contar_cache('modelo_tkm')
+@st.cache_resource(max_entries=2)
+def carregar_modelo_tkm(assinatura=None):
+    """Cubo TKM processado uma única vez por versão da fonte.
+
+    Compartilhado entre as sessões; a página apenas consulta o ano desejado
+    (somente leitura). Também usa o snapshot binário quando disponível.
+    """
+    registrar_falha('modelo_tkm')
+    return congelar_cubo(montar_cubo_fonte('tkm', assinatura))
+
+class VariacoesModais(NamedTuple):
+    """Variações pré-calculadas para os pares (ano base <= ano comparação).
+
+    Eixos de delta_pp e cagr_tkm: País (mesma ordem do cubo) x Par x Modal.
+    Só o triângulo superior é guardado (base posterior à comparação não é
+    consultada); base e comparacao dão as posições dos anos de cada par e
+    idx_par (Ano base x Ano comparação, -1 abaixo da diagonal) a do par.
+    """
+    anos: list
+    idx_ano: dict
+    base: np.ndarray
+    comparacao: np.ndarray
+    idx_par: np.ndarray
+    delta_pp: np.ndarray
+    cagr_tkm: np.ndarray
+
+# Variações em float32 (como as participações) e calculadas em blocos de
+# países, limitando os temporários em float64 do CAGR
+TIPO_VARIACAO = np.float32
+BLOCO_PAISES = 1024
+
+def pares_anos(n_anos):
+    """Posições (base, comparação) dos pares com base <= comparação e o mapa Ano x Ano -> par."""
+    base, comparacao = np.triu_indices(n_anos)
+    idx_par = np.full((n_anos, n_anos), -1, dtype=np.intp)
+    idx_par[base, comparacao] = np.arange(len(base))
+    return base, comparacao, idx_par
+
+def posicao_par(variacoes, ano_a, ano_b):
+    """Posição do par (ano base, ano comparação); KeyError se ausente ou invertido."""
+    par = variacoes.idx_par[variacoes.idx_ano[int(ano_a)], variacoes.idx_ano[int(ano_b)]]
+    if par < 0:
+        raise KeyError((ano_a, ano_b))
+    return int(par)
+
+def alinhar_tkm(cubo, cubo_tkm):
+    """tkm no eixo País x Ano do cubo percentual (ausente = NaN)."""
+    tkm = np.full(cubo.valores.shape, np.nan)
+    linhas = [i for i, p in enumerate(cubo.paises) if p in cubo_tkm.idx_pais]
+    cols_anos = [j for j, a in enumerate(cubo.anos) if a in cubo_tkm.idx_ano]
+    tkm[np.ix_(linhas, cols_anos)] = cubo_tkm.valores[np.ix_(
+        [cubo_tkm.idx_pais[cubo.paises[i]] for i in linhas],
+        [cubo_tkm.idx_ano[cubo.anos[j]] for j in cols_anos],
+    )]
+    return tkm
+
+def calcular_pares(pct, tkm, anos, base, comparacao):
+    """delta_pp e cagr_tkm de todas as linhas para os pares (base[k], comparacao[k]) (posições)."""
+    forma = (len(pct), len(base), pct.shape[2])
+    delta_pp = np.empty(forma, dtype=TIPO_VARIACAO)
+    cagr_tkm = np.empty(forma, dtype=TIPO_VARIACAO)
+    # CAGR = (tkm_j / tkm_i) ^ (1 / (ano_j - ano_i)) - 1, apenas para j > i
+    intervalo = (anos[comparacao] - anos[base])[None, :, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expoente = np.where(intervalo > 0, 1.0 / intervalo, np.nan)
+    for inicio in range(0, len(pct), BLOCO_PAISES):
+        linhas = slice(inicio, inicio + BLOCO_PAISES)
+        # Participações (p.p.): delta[p, k, m] = valor[p, comparacao[k], m] - valor[p, base[k], m]
+        delta_pp[linhas] = pct[linhas][:, comparacao] - pct[linhas][:, base]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            razao = tkm[linhas][:, comparacao] / tkm[linhas][:, base]
+            # Explícito: 1.0 ** nan == 1, e a diagonal (tkm igual) sairia como CAGR 0
+            cagr_tkm[linhas] = np.where((razao > 0) & (intervalo > 0), razao ** expoente - 1, np.nan)
+    return delta_pp, cagr_tkm
+
+def celulas_alteradas(antes, depois):
+    """Por linha: alguma célula difere (NaN igual a NaN)?"""
+    iguais = (antes == depois) | (np.isnan(antes) & np.isnan(depois))
+    return ~iguais.reshape(len(iguais), -1).all(axis=1)
+
+def como_fatia(posicoes):
+    """slice equivalente a posições contíguas e crescentes (cópia em bloco); senão as posições."""
+    if len(posicoes) and np.array_equal(posicoes, np.arange(posicoes[0], posicoes[0] + len(posicoes))):
+        return slice(int(posicoes[0]), int(posicoes[0]) + len(posicoes))
+    return posicoes
+
+def indice_bloco(paises, pares):
+    """Índice País x Par; fatias quando possível (evita np.ix_)."""
+    paises, pares = como_fatia(paises), como_fatia(pares)
+    if isinstance(paises, slice) or isinstance(pares, slice):
+        return paises, pares
+    return np.ix_(paises, pares)
+
+def atualizar_pares(anterior, cubo, tkm):
+    """Variações reaproveitando o cálculo anterior; recalcula só o afetado.
+
+    Países novos ou com alguma célula alterada (percentual ou tkm) têm todos
+    os pares recalculados; para os demais, só os pares com algum ano novo.
+    Devolve os eixos de pares e as variações.
+    """
+    cubo_ant, tkm_ant, variacoes_ant = anterior
+    anos = np.array(cubo.anos, dtype=float)
+    paises_ant = np.array([i for i, p in enumerate(cubo_ant.paises) if p in cubo.idx_pais], dtype=np.intp)
+    paises_novo = np.array([cubo.idx_pais[cubo_ant.paises[i]] for i in paises_ant], dtype=np.intp)
+    anos_ant = np.array([j for j, a in enumerate(cubo_ant.anos) if a in cubo.idx_ano], dtype=np.intp)
+    anos_novo = np.array([cubo.idx_ano[cubo_ant.anos[j]] for j in anos_ant], dtype=np.intp)
+
+    alterados = (
+        celulas_alteradas(cubo_ant.valores[np.ix_(paises_ant, anos_ant)], cubo.valores[np.ix_(paises_novo, anos_novo)])
+        | celulas_alteradas(tkm_ant[np.ix_(paises_ant, anos_ant)], tkm[np.ix_(paises_novo, anos_novo)])
+    )
+    estaveis_ant, estaveis_novo = paises_ant[~alterados], paises_novo[~alterados]
+    afetados = np.setdiff1d(np.arange(len(cubo.paises)), estaveis_novo)
+
+    # Par anterior de cada par (-1 se algum dos anos é novo)
+    base, comparacao, idx_par = pares_anos(len(cubo.anos))
+    ano_ant = np.full(len(cubo.anos), -1, dtype=np.intp)
+    ano_ant[anos_novo] = anos_ant
+    origem = np.where(
+        (ano_ant[base] >= 0) & (ano_ant[comparacao] >= 0),
+        variacoes_ant.idx_par[ano_ant[base], ano_ant[comparacao]], -1
+    )
+    mantidos, inseridos = np.flatnonzero(origem >= 0), np.flatnonzero(origem < 0)
+
+    forma = (len(cubo.paises), len(base), len(cubo.modais))
+    delta_pp = np.empty(forma, dtype=TIPO_VARIACAO)
+    cagr_tkm = np.empty(forma, dtype=TIPO_VARIACAO)
+    # 1. Pares já calculados (países estáveis x pares de anos já existentes)
+    destino, fonte = indice_bloco(estaveis_novo, mantidos), indice_bloco(estaveis_ant, origem[mantidos])
+    delta_pp[destino] = variacoes_ant.delta_pp[fonte]
+    cagr_tkm[destino] = variacoes_ant.cagr_tkm[fonte]
+    # 2. Países novos/alterados: todos os pares
+    if len(afetados):
+        delta_pp[afetados], cagr_tkm[afetados] = calcular_pares(cubo.valores[afetados], tkm[afetados], anos, base, comparacao)
+    # 3. Pares com algum ano novo: todos os países
+    if len(inseridos):
+        delta_pp[:, inseridos], cagr_tkm[:, inseridos] = calcular_pares(cubo.valores, tkm, anos, base[inseridos], comparacao[inseridos])
+    return (base, comparacao, idx_par), delta_pp, cagr_tkm
+
+# Uma única versão residente: a nova substitui a anterior no cache, e
+# _variacoes_recentes aponta para o mesmo objeto (sem segunda cópia)
+@contar_cache('variacoes')
+@st.cache_resource(max_entries=1)
+def carregar_variacoes(assinatura_pct=None, assinatura_tkm=None):
+    """Monta, uma vez por versão das fontes, as variações em p.p. e o CAGR do tkm."""
+    registrar_falha('variacoes')
+    cubo = carregar_cubo_percentuais(assinatura_pct)
+    tkm = alinhar_tkm(cubo, carregar_modelo_tkm(assinatura_tkm))
+    with _trava_recentes:
+        anterior = _variacoes_recentes.get('ultimo')
+    if anterior is not None:
+        (base, comparacao, idx_par), delta_pp, cagr_tkm = atualizar_pares(anterior, cubo, tkm)
+    else:
+        base, comparacao, idx_par = pares_anos(len(cubo.anos))
+        delta_pp, cagr_tkm = calcular_pares(cubo.valores, tkm, np.array(cubo.anos, dtype=float), base, comparacao)
+
+    # Compartilhado entre as sessões: somente leitura
+    variacoes = VariacoesModais(
+        anos=tuple(cubo.anos),
+        idx_ano=MappingProxyType({a: i for i, a in enumerate(cubo.anos)}),
+        base=congelar_array(base),
+        comparacao=congelar_array(comparacao),
+        idx_par=congelar_array(idx_par),
+        delta_pp=congelar_array(delta_pp),
+        cagr_tkm=congelar_array(cagr_tkm),
+    )
+    with _trava_recentes:
+        _variacoes_recentes['ultimo'] = (cubo, tkm, variacoes)
+    return variacoes
+
+# ==============================================================================
+# 6. LINHA DE COMANDO
+# ==============================================================================
+# python modelo_dados.py snapshot   -> grava o snapshot binário
+# python modelo_dados.py partida    -> mede a partida a frio com e sem snapshot
+CODIGO_PARTIDA = """
+import time
+inicio = time.perf_counter()
+import modelo_dados as m
+importado = time.perf_counter()
+m.carregar_dados_completos(m.assinatura_fonte('percentuais'))
+m.carregar_modelo_tkm(m.assinatura_fonte('tkm'))
+fim = time.perf_counter()
+print(importado - inicio, fim - importado)
+"""
+
+def medir_partida(repeticoes=5):
+    """Mediana (s) de import + carga em processos novos, sem e com snapshot."""
+    resultados = {}
+    for rotulo, usar in [('csv', '0'), ('snapshot', '1')]:
+        amostras = []
+        for _ in range(repeticoes):
+            saida = subprocess.run(
+                [sys.executable, '-c', CODIGO_PARTIDA],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                env={**os.environ, 'APP1_USAR_SNAPSHOT': usar},
+                capture_output=True, text=True, check=True
+            )
+            amostras.append([float(v) for v in saida.stdout.split()])
+        importacao, carga = np.median(np.array(amostras), axis=0)
+        resultados[rotulo] = {'importacao': importacao, 'carga': carga}
+    return resultados
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ferramentas do modelo de dados do App1.")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    cmd_snapshot = comandos.add_parser('snapshot', help="Grava o snapshot binário dos dados processados.")
+    cmd_snapshot.add_argument('--destino', default=None, help="Diretório do snapshot (padrão: APP1_SNAPSHOT_DIR).")
+    cmd_partida = comandos.add_parser('partida', help="Mede a partida a frio com e sem snapshot.")
+    cmd_partida.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.comando == 'snapshot':
+        manifesto = construir_snapshot(args.destino)
+        for nome, item in manifesto['cubos'].items():
+            print(f"{nome}: {len(item['paises'])} países x {len(item['anos'])} anos -> {item['arquivo']} ({item['fonte']})")
+    else:
+        if ler_manifesto(DIRETORIO_SNAPSHOT) is None:
+            print("Aviso: snapshot ausente; rode 'python modelo_dados.py snapshot' antes.")
+        for rotulo, tempos in medir_partida(args.repeticoes).items():
+            print(f"{rotulo:>9}: importação {tempos['importacao'] * 1000:.1f} ms | carga {tempos['carga'] * 1000:.1f} ms")
@@ -0,0 +1,146 @@
+"""Projeção das participações modais (tendência) para anos futuros.
+
+Ajusta, em uma única conta vetorizada, uma tendência por série País x Modal
+sobre todos os anos reais do cubo percentual (sem laço por país):
+
+* linear:     participação = a + b * ano
+* log-linear: log(participação) = a + b * ano
+
+Opcionalmente as três participações projetadas são reescaladas para somar
+100%. O resultado é um CuboModal com os anos projetados, guardado em cache
+e exibido na linha do tempo como posições "AAAA (proj.)".
+
+    python projecao.py --paises 10000    # mede o ajuste em lote
+"""
+import time
+import argparse
+
+import numpy as np
+import streamlit as st
+
+from instrumentacao import contar_cache, registrar_falha
+from modelo_dados import (
+    TIPO_PARTICIPACAO,
+    carregar_cubo_percentuais,
+    congelar_cubo,
+    montar_cubo,
+)
+
+MODELOS = ['linear', 'log-linear']
+HORIZONTE_PROJECAO = 2030
+# Séries com menos pontos válidos do que isso ficam sem projeção
+MINIMO_PONTOS = 3
+SUFIXO_PROJECAO = ' (proj.)'
+
+# ==============================================================================
+# 1. AJUSTE EM LOTE
+# ==============================================================================
+def ajustar_tendencia(valores, anos, anos_futuros, modelo='linear'):
+    """Mínimos quadrados de todas as séries de uma vez.
+
+    valores: País x Ano x Modal (NaN = sem dado). Cada série País x Modal
+    recebe sua própria reta (forma fechada, com máscara de NaN). Retorna o
+    array País x Ano futuro x Modal.
+    """
+    y = np.asarray(valores, dtype=float)
+    if modelo == 'log-linear':
+        with np.errstate(divide='ignore', invalid='ignore'):
+            y = np.log(np.where(y > 0, y, np.nan))
+    elif modelo != 'linear':
+        raise ValueError(f"Modelo desconhecido: {modelo!r} (use {MODELOS})")
+
+    # Anos centrados: somas menores e ajuste numericamente estável
+    anos = np.asarray(anos, dtype=float)
+    centro = anos.mean()
+    t = (anos - centro)[None, :, None]
+    validos = ~np.isnan(y)
+    y = np.where(validos, y, 0.0)
+    t_validos = np.where(validos, t, 0.0)
+
+    n = validos.sum(axis=1)
+    soma_t = t_validos.sum(axis=1)
+    soma_tt = (t_validos * t_validos).sum(axis=1)
+    soma_y = y.sum(axis=1)
+    soma_ty = (t_validos * y).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denominador = n * soma_tt - soma_t ** 2
+        inclinacao = (n * soma_ty - soma_t * soma_y) / denominador
+        intercepto = (soma_y - inclinacao * soma_t) / n
+    inclinacao[(n < MINIMO_PONTOS) | (denominador <= 0)] = np.nan
+
+    t_futuro = (np.asarray(anos_futuros, dtype=float) - centro)[None, :, None]
+    projetado = intercepto[:, None, :] + inclinacao[:, None, :] * t_futuro
+    if modelo == 'log-linear':
+        projetado = np.exp(projetado)
+    return projetado
+
+def restringir_participacoes(projetado, soma_100=True):
+    """Limita a [0, 100] e, com soma_100, reescala os modais para somar 100%."""
+    projetado = np.clip(projetado, 0.0, 100.0)
+    if soma_100:
+        total = np.nansum(projetado, axis=2, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            projetado = np.where(total > 0, projetado * (100.0 / total), np.nan)
+    return np.round(projetado, 2)
+
+def projetar_cubo(cubo, horizonte=HORIZONTE_PROJECAO, modelo='linear', soma_100=True):
+    """Cubo País x Ano projetado x Modal (anos após o último ano real até o horizonte)."""
+    anos_futuros = list(range(cubo.anos[-1] + 1, horizonte + 1)) if cubo.anos else []
+    projetado = restringir_participacoes(
+        ajustar_tendencia(cubo.valores, cubo.anos, anos_futuros, modelo),
+        soma_100
+    )
+    return montar_cubo(cubo.paises, anos_futuros, cubo.modais, projetado.astype(TIPO_PARTICIPACAO))
+
+# ==============================================================================
+# 2. CACHE E RÓTULOS DA LINHA DO TEMPO
+# ==============================================================================
+@contar_cache('projecoes')
+@st.cache_resource(max_entries=8)
+def carregar_projecoes(assinatura=None, modelo='linear', soma_100=True, horizonte=HORIZONTE_PROJECAO):
+    """Projeção em cache por versão da fonte e parâmetros (somente leitura)."""
+    registrar_falha('projecoes')
+    cubo = carregar_cubo_percentuais(assinatura)
+    return congelar_cubo(projetar_cubo(cubo, horizonte, modelo, soma_100))
+
+def rotulos_projetados(cubo_projecao):
+    """Posições da linha do tempo para os anos projetados."""
+    return [f"{ano}{SUFIXO_PROJECAO}" for ano in cubo_projecao.anos]
+
+def ano_projetado(rotulo):
+    """Ano de uma posição projetada ("2026 (proj.)" -> 2026); None se for real."""
+    if isinstance(rotulo, str) and rotulo.endswith(SUFIXO_PROJECAO):
+        return int(rotulo[:-len(SUFIXO_PROJECAO)])
+    return None
+
+# ==============================================================================
+# 3. LINHA DE COMANDO
+# ==============================================================================
+def medir_ajuste(n_paises, n_anos=10, repeticoes=5, semente=0):
+    """Mediana (s) do ajuste em lote para séries sintéticas País x Ano x 3 modais."""
+    rng = np.random.default_rng(semente)
+    participacao = rng.dirichlet([2.0, 5.0, 1.0], size=(n_paises, n_anos)) * 100
+    participacao[rng.random(participacao.shape) < 0.05] = np.nan
+    cubo = montar_cubo(
+        [f"País {i}" for i in range(n_paises)], range(2024 - n_anos, 2024),
+        ['Ferroviário (%)', 'Rodoviário (%)', 'Aquaviário (%)'],
+        participacao.astype(TIPO_PARTICIPACAO)
+    )
+    resultados = {}
+    for modelo in MODELOS:
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            projetar_cubo(cubo, modelo=modelo)
+            tempos.append(time.perf_counter() - inicio)
+        resultados[modelo] = float(np.median(tempos))
+    return resultados
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mede a projeção em lote das participações modais.")
+    parser.add_argument('--paises', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--anos', type=int, default=10)
+    args = parser.parse_args()
+    for n_paises in args.paises:
+        for modelo, tempo in medir_ajuste(n_paises, args.anos).items():
+            print(f"{n_paises:>7} países x {args.anos} anos | {modelo:<10}: {tempo * 1000:.1f} ms")
@@ -0,0 +1,154 @@
+"""Relatório de validação das fontes, montado sobre os cubos já carregados.
+
+As verificações de cada fonte são feitas na própria ingestão (ocorrencias
+do cubo, ver OcorrenciasFonte em modelo_dados, gravadas também no manifesto
+do snapshot); aqui elas viram tabelas, junto das verificações entre as duas
+fontes. Nada é relido nem reprocessado:
+
+* chaves:      nomes de país alterados pela normalização (espaços, Unicode);
+* somas:       País x Ano cujas participações informadas não somam ~100%
+               ou com modal ausente;
+* piso:        células positivas abaixo de PISO_PERCENTUAL, exibidas como o
+               piso (antes alteradas sem aviso);
+* divergencias: participação (como exibida) x recalculada do tkm absoluto;
+* cobertura:   países com série histórica em apenas uma das fontes.
+
+    python validacao.py      # imprime o resumo para as fontes atuais
+"""
+import time
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from instrumentacao import contar_cache, registrar_falha
+from modelo_dados import (
+    COLUNAS_MODAIS,
+    PISO_PERCENTUAL,
+    alinhar_tkm,
+    assinatura_fonte,
+    carregar_cubo_percentuais,
+    carregar_modelo_tkm,
+)
+
+# Participação exibida x recalculada do tkm: diferença acima disso (p.p.)
+TOLERANCIA_TKM_PP = 1.0
+
+class RelatorioValidacao(NamedTuple):
+    """Resumo (contagens) e uma tabela por verificação (vazia = sem ocorrências)."""
+    resumo: dict
+    chaves: pd.DataFrame
+    somas: pd.DataFrame
+    piso: pd.DataFrame
+    divergencias: pd.DataFrame
+    cobertura: pd.DataFrame
+
+# ==============================================================================
+# 1. OCORRÊNCIAS DA INGESTÃO (POR FONTE)
+# ==============================================================================
+def tabela_chaves(cubos):
+    """Nomes de país alterados pela normalização, por fonte ({nome: cubo})."""
+    return pd.DataFrame(
+        [(nome, repr(original), normalizada) for nome, cubo in cubos.items() for original, normalizada in cubo.ocorrencias.chaves],
+        columns=['Fonte', 'Original', 'Normalizada']
+    )
+
+def tabela_ocorrencias(cubo, registros, colunas):
+    """Registros (País, Ano, ...) em tabela, na ordem do cubo (país, ano)."""
+    df = pd.DataFrame(list(registros), columns=['Pais', 'Ano'] + colunas)
+    ordem = np.lexsort((df['Ano'].to_numpy(dtype=int), df['Pais'].map(cubo.idx_pais).to_numpy(dtype=int)))
+    df = df.iloc[ordem].reset_index(drop=True)
+    df['Ano'] = df['Ano'].astype(str).astype(object)
+    return df
+
+def tabela_somas(cubo):
+    """País x Ano com soma fora de 100 ± TOLERANCIA_SOMA_PP ou com modal ausente."""
+    return tabela_ocorrencias(cubo, cubo.ocorrencias.somas, ['Soma (%)', 'Situação'])
+
+def tabela_piso(cubo):
+    """Células positivas abaixo do piso (exibidas como PISO_PERCENTUAL)."""
+    df = tabela_ocorrencias(cubo, cubo.ocorrencias.piso, ['Modal', 'Informado (%)'])
+    df['Exibido (%)'] = PISO_PERCENTUAL
+    return df
+
+# ==============================================================================
+# 2. VERIFICAÇÕES ENTRE AS FONTES (EM LOTE, SOBRE OS CUBOS)
+# ==============================================================================
+def celulas(cubo, posicoes, **colunas):
+    """Tabela Pais, Ano (, Modal) das posições (tupla de np.nonzero) + colunas extras."""
+    df = pd.DataFrame({
+        'Pais': np.asarray(cubo.paises, dtype=object)[posicoes[0]],
+        'Ano': np.asarray([str(a) for a in cubo.anos], dtype=object)[posicoes[1]],
+    })
+    if len(posicoes) > 2:
+        df['Modal'] = np.asarray(COLUNAS_MODAIS, dtype=object)[posicoes[2]]
+    for coluna, valores in colunas.items():
+        df[coluna] = np.round(valores, 4)
+    return df
+
+def verificar_tkm(cubo, cubo_tkm):
+    """Participação exibida x recalculada do tkm (só onde os três modais têm tkm)."""
+    tkm = alinhar_tkm(cubo, cubo_tkm)
+    total = tkm.sum(axis=2, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        recalculado = np.where(total > 0, tkm / total * 100, np.nan)
+    participacao = cubo.valores.astype(float)
+    diferenca = participacao - recalculado
+    posicoes = np.nonzero(np.abs(np.nan_to_num(diferenca)) > TOLERANCIA_TKM_PP)
+    df = celulas(cubo, posicoes, **{
+        'Participação (%)': participacao[posicoes],
+        'Recalculado do tkm (%)': recalculado[posicoes],
+        'Diferença (p.p.)': diferenca[posicoes],
+    })
+    return df, int(np.count_nonzero(~np.isnan(diferenca)))
+
+def verificar_cobertura(cubo, cubo_tkm):
+    """Países com série histórica em só uma das fontes."""
+    com_pct = {p for p, tem in zip(cubo.paises, ~np.isnan(cubo.valores).all(axis=(1, 2))) if tem}
+    com_tkm = {p for p, tem in zip(cubo_tkm.paises, ~np.isnan(cubo_tkm.valores).all(axis=(1, 2))) if tem}
+    return pd.DataFrame(
+        [(p, 'Sem tkm') for p in sorted(com_pct - com_tkm)] + [(p, 'Sem percentuais') for p in sorted(com_tkm - com_pct)],
+        columns=['Pais', 'Situação']
+    )
+
+def validar_fontes(assinatura_pct=None, assinatura_tkm=None):
+    """Relatório de todas as verificações para a versão atual das fontes."""
+    cubo = carregar_cubo_percentuais(assinatura_pct)
+    cubo_tkm = carregar_modelo_tkm(assinatura_tkm)
+
+    chaves = tabela_chaves({'percentuais': cubo, 'tkm': cubo_tkm})
+    somas = tabela_somas(cubo)
+    piso = tabela_piso(cubo)
+    divergencias, comparadas = verificar_tkm(cubo, cubo_tkm)
+    cobertura = verificar_cobertura(cubo, cubo_tkm)
+    resumo = {
+        'chaves': len(chaves),
+        'somas': len(somas),
+        'piso': len(piso),
+        'divergencias': len(divergencias),
+        'cobertura': len(cobertura),
+        'celulas_comparadas': comparadas,
+        'linhas_verificadas': int(np.count_nonzero(~np.isnan(cubo.valores).all(axis=2))),
+    }
+    return RelatorioValidacao(resumo, chaves, somas, piso, divergencias, cobertura)
+
+# ==============================================================================
+# 3. CARREGAMENTO EM CACHE
+# ==============================================================================
+@contar_cache('validacao')
+@st.cache_resource(max_entries=2)
+def carregar_validacao(assinatura_pct=None, assinatura_tkm=None):
+    """Relatório da versão atual das fontes, calculado uma vez (somente leitura)."""
+    registrar_falha('validacao')
+    return validar_fontes(assinatura_pct, assinatura_tkm)
+
+if __name__ == '__main__':
+    inicio = time.perf_counter()
+    relatorio = validar_fontes(assinatura_fonte('percentuais'), assinatura_fonte('tkm'))
+    print(f"validação em {(time.perf_counter() - inicio) * 1000:.1f} ms: {relatorio.resumo}")
+    for nome in ['chaves', 'somas', 'piso', 'divergencias', 'cobertura']:
+        tabela = getattr(relatorio, nome)
+        if not tabela.empty:
+            print(f"\n== {nome} ({len(tabela)}) ==")
+            print(tabela.head(15).to_string(index=False))